@@ -9,24 +9,55 @@ Major performance improvements:
 - Circuit breaker pattern for error handling
 """
 
-from flask import Flask, request, jsonify, render_template_string, send_file
+from flask import Flask, Response, request, jsonify, render_template_string, send_file, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import secure_filename
+from flask.json.provider import DefaultJSONProvider
 import pandas as pd
 import os
+import sys
+import tempfile
 import time
 import random
+import math
 import re
 import json
-from io import BytesIO
 from urllib.parse import urlparse, parse_qs, unquote
 import traceback
-import gc
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock, RLock
-from collections import defaultdict
 import hashlib
+import gzip
+import gc
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Lock, RLock, Event
+from collections import defaultdict, deque, namedtuple, OrderedDict
 import pickle
-from functools import wraps
+from functools import wraps, lru_cache
 import logging
+import requests
+from cachetools import TTLCache
+import xlsxwriter
+import asyncio
+import aiohttp
+
+# Faster JSON decoding for large ytInitialData payloads when available
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
+# Brotli is optional; the landing page falls back to gzip without it
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Arrow reads full CSV uploads straight from the request stream
+try:
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
 
 # Selenium imports
 from selenium import webdriver
@@ -39,43 +70,126 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes jsonify responses with orjson"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj, default=self.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Configuration ---
-MAX_WORKERS = 3  # Concurrent threads
+MAX_WORKERS = int(os.environ.get('SCRAPER_MAX_WORKERS', '3'))  # Concurrent threads; ceiling of the adaptive window
+MIN_WORKERS = min(2, MAX_WORKERS)  # Floor for the adaptive concurrency window
+INITIAL_WORKERS = min(3, MAX_WORKERS)  # Window each batch starts from before any feedback
+AIMD_INCREASE = 0.5  # Added to the concurrency window after a window of fast, clean results
+AIMD_WINDOW = 8  # Completed rows per concurrency adjustment
+AIMD_TARGET_LATENCY = 20  # Seconds per row above which the window stops growing
+THROTTLE_MESSAGES = ('Rate limited', 'timeout', 'Circuit breaker open')
 INITIAL_DELAY = 2  # Start with 2 seconds
 MAX_DELAY = 30  # Maximum delay between requests
 CACHE_EXPIRY = 3600  # Cache for 1 hour
+CACHE_MAX_SIZE = 1024  # Least recently used entries are evicted past this
+MAX_PROCESSED_FILES = 64  # Result workbooks kept in the temp dir for /download
 CIRCUIT_BREAKER_THRESHOLD = 5  # Failures before circuit opens
-DRIVER_POOL_SIZE = 3
+CIRCUIT_BREAKER_COOLDOWN = 300  # Seconds the circuit stays open before a retry is allowed
+DRIVER_POOL_SIZE = MAX_WORKERS  # Idle drivers kept, so a fully open window never churns Chrome
+DRIVER_PROBE_INTERVAL = 30  # Seconds a driver that just worked is trusted without a liveness probe
+HTTP_TIMEOUT = 20  # Seconds for the plain HTTP fast path
+CSV_BLOCK_SIZE = 1 << 20  # Bytes per block for the multithreaded Arrow CSV reader
+EXCEL_DATE_FORMAT = 'yyyy-mm-dd hh:mm:ss'  # Number format for date and datetime cells in result workbooks
+
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+# Static Chrome flags, built once; only the user agent varies per driver
+CHROME_BASE_ARGS = (
+    # Required for Docker/containerized environments
+    "--headless",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    # Aggressive memory optimization
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-plugins",
+    "--disable-images",
+    "--disable-javascript",
+    "--disable-dev-tools",
+    "--mute-audio",
+    "--window-size=800,600",
+    "--blink-settings=imagesEnabled=false",
+    "--js-flags=--max-old-space-size=64",
+    "--memory-pressure-off",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+    # Anti-detection
+    "--disable-blink-features=AutomationControlled",
+)
+
+# Requests Chrome refuses outright; none of them carry ytInitialData
+BLOCKED_URL_PATTERNS = [
+    '*.jpg', '*.jpeg', '*.png', '*.webp', '*.gif', '*.svg',
+    '*.woff', '*.woff2', '*.ttf',
+    '*google-analytics.com*', '*doubleclick.net*', '*.googlevideo.com*', '*.ytimg.com*'
+]
 
 # --- Thread-safe storage ---
-driver_pool = []
+driver_pool = []  # (driver, last_ok_ts) pairs
 driver_lock = Lock()
 rate_limiter_lock = RLock()
 cache_lock = Lock()
 circuit_breaker_lock = Lock()
 
-# Rate limiting state
-rate_limiter_state = {
-    'last_request_time': 0,
-    'current_delay': INITIAL_DELAY,
-    'consecutive_failures': 0,
-    'blocked_until': 0
-}
+# Rate limiting state, one entry per host so a host that blocked us does not slow the others
+def new_rate_limiter_state():
+    return {
+        'last_request_time': 0,
+        'current_delay': INITIAL_DELAY,
+        'consecutive_failures': 0,
+        'blocked_until': 0
+    }
+
+rate_limiter_state = defaultdict(new_rate_limiter_state)
 
-# Circuit breaker state
+# Circuit breaker state; the open flag is an Event so the closed-circuit hot path takes no lock
 circuit_breaker_state = {
     'failures': 0,
-    'last_failure_time': 0,
-    'is_open': False
+    'last_failure_time': 0
 }
+circuit_open_event = Event()
+
+# Bounded in-memory cache; entries expire after CACHE_EXPIRY and the least recently used go first
+url_cache = TTLCache(maxsize=CACHE_MAX_SIZE, ttl=CACHE_EXPIRY)
+
+# Result workbooks written for /download, oldest first: path -> creation time
+processed_files = OrderedDict()
+processed_files_lock = Lock()
+
+# One long-lived worker pool shared by every upload instead of a new one per request
+scrape_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='yt-scrape')
 
-# Simple in-memory cache
-url_cache = {}
+# Keep-alive HTTP session for the fast path
+http_session = requests.Session()
+http_session.headers.update({'Accept-Language': 'en-US,en;q=0.9'})
+
+# Scraped links are kept as lightweight tuples rather than one dict per link
+LinkRecord = namedtuple('LinkRecord', ['title', 'url'])
 
 # --- Link Categorization ---
 SOCIAL_MEDIA_KEYWORDS = {
@@ -86,28 +200,85 @@ SOCIAL_MEDIA_KEYWORDS = {
     'TikTok': ['tiktok.com'],
 }
 
+# Google/YouTube-owned hosts that never count as a channel's external link
+EXCLUDED_DOMAINS = frozenset([
+    'youtube.com', 'youtu.be', 'googleapis.com', 'googleusercontent.com',
+    'gstatic.com', 'google.com', 'googlevideo.com'
+])
+EXCLUDED_DOMAIN_SUFFIXES = tuple('.' + domain for domain in EXCLUDED_DOMAINS)
+
+# Flat domain -> category lookup so categorizing a link is a dict hit per host label
+KEYWORD_TO_CATEGORY = {
+    keyword: category
+    for category, keywords in SOCIAL_MEDIA_KEYWORDS.items()
+    for keyword in keywords
+}
+
+# One case-insensitive regex per category matching a URL whose host is the domain or a subdomain of it
+CATEGORY_URL_PATTERNS = {
+    category: re.compile(
+        r'^[a-z][a-z0-9+.-]*://(?:[^/?#@]*@)?(?:[^/?#:]*\.)?(?:'
+        + '|'.join(re.escape(keyword) for keyword in keywords)
+        + r')(?::\d+)?(?:[/?#]|$)',
+        re.IGNORECASE
+    )
+    for category, keywords in SOCIAL_MEDIA_KEYWORDS.items()
+}
+
+# --- Extraction Patterns ---
+# Markers that precede the ytInitialData object, most specific first
+YT_INITIAL_DATA_ANCHORS = [
+    'var ytInitialData =',
+    'window["ytInitialData"] =',
+    'window.ytInitialData =',
+    'ytInitialData =',
+    'ytInitialData=',
+]
+
+# Renderers that carry the channel's external links, and the keys they use for them
+LINK_CONTAINER_KEYS = frozenset(['aboutChannelViewModel', 'channelMetadataRenderer', 'c4TabbedHeaderRenderer'])
+LINK_ARRAY_KEYS = ('links', 'headerLinks', 'customLinks')
+
+# Keys tried, in order, when a link item has no known structure
+TITLE_KEYS = ('content', 'simpleText', 'text', 'title')
+URL_KEYS = ('url', 'href')
+
+# CSS selectors for the DOM fallback, each paired with a substring its matches must put in the page source
+DOM_LINK_SELECTORS = [
+    ('a[href*="/redirect?"]', '/redirect?'),
+    ('a[href*="youtube.com/redirect"]', 'youtube.com/redirect'),
+    ('[data-target-new-window="true"]', 'data-target-new-window'),
+    ('.channel-external-link', 'channel-external-link'),
+    ('.ytd-channel-external-link-view-model', 'ytd-channel-external-link-view-model'),
+    ('yt-formatted-string a[href^="http"]', 'yt-formatted-string'),
+]
+
+# Phrases YouTube shows when it throttles or challenges us, matched without lowercasing the page
+BLOCK_PATTERN = re.compile(r'unusual traffic|blocked|captcha|robot', re.IGNORECASE)
+
+# Characters that matter when walking a JSON object for its closing brace
+JSON_TOKEN_PATTERN = re.compile(r'[{}"\\]')
+
 # --- Caching Decorator ---
-def cache_result(expiry_seconds=CACHE_EXPIRY):
+def cache_result(cache=url_cache):
     """Decorator to cache function results"""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Create cache key
-            cache_key = hashlib.md5(str(args).encode()).hexdigest()
+            # Arguments are channel URL strings, so they are hashable keys as they are
+            cache_key = args[0] if len(args) == 1 else args
             
+            # TTLCache drops expired entries itself, but it is not thread-safe on its own
             with cache_lock:
-                if cache_key in url_cache:
-                    cached_result, timestamp = url_cache[cache_key]
-                    if time.time() - timestamp < expiry_seconds:
-                        return cached_result
-                    else:
-                        del url_cache[cache_key]
+                cached_result = cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
             
             # Execute function and cache result
             result = func(*args, **kwargs)
             
             with cache_lock:
-                url_cache[cache_key] = (result, time.time())
+                cache[cache_key] = result
             
             return result
         return wrapper
@@ -118,10 +289,10 @@ def circuit_breaker(func):
     """Circuit breaker pattern to handle repeated failures"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        with circuit_breaker_lock:
-            if circuit_breaker_state['is_open']:
-                if time.time() - circuit_breaker_state['last_failure_time'] > 300:  # 5 minutes
-                    circuit_breaker_state['is_open'] = False
+        if circuit_open_event.is_set():
+            with circuit_breaker_lock:
+                if time.time() - circuit_breaker_state['last_failure_time'] > CIRCUIT_BREAKER_COOLDOWN:
+                    circuit_open_event.clear()
                     circuit_breaker_state['failures'] = 0
                     logger.info("Circuit breaker: Attempting to close")
                 else:
@@ -130,10 +301,11 @@ def circuit_breaker(func):
         try:
             result = func(*args, **kwargs)
             
-            # Reset circuit breaker on success
-            with circuit_breaker_lock:
-                circuit_breaker_state['failures'] = 0
-                circuit_breaker_state['is_open'] = False
+            # Reset circuit breaker on success; only lock when there is something to reset
+            if circuit_breaker_state['failures']:
+                with circuit_breaker_lock:
+                    circuit_breaker_state['failures'] = 0
+                    circuit_open_event.clear()
             
             return result
             
@@ -143,132 +315,156 @@ def circuit_breaker(func):
                 circuit_breaker_state['last_failure_time'] = time.time()
                 
                 if circuit_breaker_state['failures'] >= CIRCUIT_BREAKER_THRESHOLD:
-                    circuit_breaker_state['is_open'] = True
-                    logger.warning(f"Circuit breaker opened after {circuit_breaker_state['failures']} failures")
+                    circuit_open_event.set()
+                    logger.warning("Circuit breaker opened after %s failures", circuit_breaker_state['failures'])
             
             raise e
     return wrapper
 
+def scrape_retry_after():
+    """Seconds until scraping may resume, or 0 if the circuit is closed and no host is blocked"""
+    now = time.time()
+    wait_until = 0
+    if circuit_open_event.is_set():
+        wait_until = circuit_breaker_state['last_failure_time'] + CIRCUIT_BREAKER_COOLDOWN
+    with rate_limiter_lock:
+        for state in rate_limiter_state.values():
+            wait_until = max(wait_until, state['blocked_until'])
+    return max(0, math.ceil(wait_until - now))
+
 # --- Smart Rate Limiter ---
-def smart_rate_limit():
+# Subdomains that serve the same site, so youtube.com, www.youtube.com and m.youtube.com share one limiter
+RATE_LIMIT_HOST_PREFIXES = ('www.', 'm.')
+
+@lru_cache(maxsize=1024)
+def rate_limit_host(url):
+    """Host whose limiter governs requests to this URL; www. and m. mirrors share their site's limiter"""
+    try:
+        host = urlparse(url).hostname or ''
+    except ValueError:
+        return ''
+    for prefix in RATE_LIMIT_HOST_PREFIXES:
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+def smart_rate_limit(host=''):
     """Implement smart rate limiting with exponential backoff"""
+    # Reserve the next request slot under the lock, then sleep outside it so other threads can book theirs
     with rate_limiter_lock:
+        state = rate_limiter_state[host]
         current_time = time.time()
         
         # Check if we're in a blocked state
-        if current_time < rate_limiter_state['blocked_until']:
-            wait_time = rate_limiter_state['blocked_until'] - current_time
-            logger.info(f"Rate limiter: Waiting {wait_time:.1f}s due to blocking")
-            time.sleep(wait_time)
-        
-        # Calculate delay since last request
-        time_since_last = current_time - rate_limiter_state['last_request_time']
+        earliest = max(current_time, state['blocked_until'])
+        if earliest > current_time:
+            logger.info("Rate limiter: Waiting %.1fs due to blocking of %s", earliest - current_time, host)
         
-        if time_since_last < rate_limiter_state['current_delay']:
-            sleep_time = rate_limiter_state['current_delay'] - time_since_last
-            logger.info(f"Rate limiter: Sleeping {sleep_time:.1f}s")
-            time.sleep(sleep_time)
-        
-        rate_limiter_state['last_request_time'] = time.time()
+        # Space this request after the last reserved one for the same host
+        slot = max(earliest, state['last_request_time'] + state['current_delay'])
+        state['last_request_time'] = slot
+    
+    sleep_time = slot - current_time
+    if sleep_time > 0:
+        logger.info("Rate limiter: Sleeping %.1fs", sleep_time)
+        time.sleep(sleep_time)
 
-def handle_rate_limit_response(is_blocked=False):
+def handle_rate_limit_response(is_blocked=False, host=''):
     """Handle rate limiting response and adjust delays"""
     with rate_limiter_lock:
+        state = rate_limiter_state[host]
         if is_blocked:
-            rate_limiter_state['consecutive_failures'] += 1
-            rate_limiter_state['current_delay'] = min(
-                rate_limiter_state['current_delay'] * 2, 
+            state['consecutive_failures'] += 1
+            state['current_delay'] = min(
+                state['current_delay'] * 2, 
                 MAX_DELAY
             )
             # Set blocked until time (2-5 minutes)
-            rate_limiter_state['blocked_until'] = time.time() + random.uniform(120, 300)
-            logger.warning(f"Rate limited - increasing delay to {rate_limiter_state['current_delay']}s")
+            state['blocked_until'] = time.time() + random.uniform(120, 300)
+            logger.warning("Rate limited by %s - increasing delay to %ss", host, state['current_delay'])
         else:
             # Successful request - gradually reduce delay
-            rate_limiter_state['consecutive_failures'] = 0
-            rate_limiter_state['current_delay'] = max(
-                rate_limiter_state['current_delay'] * 0.9,
+            state['consecutive_failures'] = 0
+            state['current_delay'] = max(
+                state['current_delay'] * 0.9,
                 INITIAL_DELAY
             )
 
 # --- WebDriver Pool Management ---
+@lru_cache(maxsize=1)
+def chromedriver_path():
+    """Resolve the chromedriver binary once; ChromeDriverManager().install() hits its disk cache on every call"""
+    return os.environ.get('CHROMEDRIVER_PATH') or ChromeDriverManager().install()
+
 def setup_selenium_driver():
     """Setup Chrome WebDriver with optimized options"""
     chrome_options = Options()
-    
-    # Required for Docker/containerized environments
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    
-    # Aggressive memory optimization
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-software-rasterizer")
-    chrome_options.add_argument("--disable-plugins")
-    chrome_options.add_argument("--disable-images")
-    chrome_options.add_argument("--disable-javascript")
-    chrome_options.add_argument("--disable-dev-tools")
-    chrome_options.add_argument("--mute-audio")
-    chrome_options.add_argument("--window-size=800,600")
-    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
-    chrome_options.add_argument("--js-flags=--max-old-space-size=64")
-    chrome_options.add_argument("--memory-pressure-off")
-    chrome_options.add_argument("--disable-background-timer-throttling")
-    chrome_options.add_argument("--disable-renderer-backgrounding")
-    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    for argument in CHROME_BASE_ARGS:
+        chrome_options.add_argument(argument)
     
     # Anti-detection options
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
     
     # User agent rotation
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    ]
-    chrome_options.add_argument(f"--user-agent={random.choice(user_agents)}")
+    chrome_options.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
     
     try:
-        if os.environ.get('CHROMEDRIVER_PATH'):
-            service = Service(os.environ.get('CHROMEDRIVER_PATH'))
-        else:
-            service = Service(ChromeDriverManager().install())
-            
+        service = Service(chromedriver_path())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
+        # Refuse heavy assets at the network layer and keep the HTTP cache between pages
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+            driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': False})
+        except WebDriverException as e:
+            logger.debug("Could not configure CDP network blocking: %s", e)
+        
         # Set timeouts
         driver.implicitly_wait(5)
         driver.set_page_load_timeout(30)
         
         return driver
     except Exception as e:
-        logger.error(f"Failed to setup Chrome WebDriver: {str(e)}")
+        logger.error("Failed to setup Chrome WebDriver: %s", e)
+        return None
+
+def confirm_driver(driver, last_ok_ts):
+    """Return when the driver was last known to work, probing it over the WebDriver wire only if that is stale"""
+    if time.time() - last_ok_ts <= DRIVER_PROBE_INTERVAL:
+        return last_ok_ts
+    try:
+        driver.current_url
+        return time.time()
+    except:
         return None
 
 def get_driver():
     """Get a driver from the pool or create a new one"""
     with driver_lock:
-        if driver_pool:
-            return driver_pool.pop()
-        else:
-            return setup_selenium_driver()
+        while driver_pool:
+            driver, last_ok_ts = driver_pool.pop()
+            if confirm_driver(driver, last_ok_ts) is not None:
+                return driver
+            try:
+                driver.quit()
+            except:
+                pass
+        return setup_selenium_driver()
 
-def return_driver(driver):
-    """Return a driver to the pool"""
+def return_driver(driver, last_ok_ts=0):
+    """Return a driver to the pool; last_ok_ts is when the caller last saw it working"""
     if driver is None:
         return
         
     with driver_lock:
         if len(driver_pool) < DRIVER_POOL_SIZE:
-            try:
-                # Check if driver is still alive
-                driver.current_url
-                driver_pool.append(driver)
-            except:
+            last_ok_ts = confirm_driver(driver, last_ok_ts)
+            if last_ok_ts is not None:
+                driver_pool.append((driver, last_ok_ts))
+            else:
                 try:
                     driver.quit()
                 except:
@@ -279,17 +475,27 @@ def return_driver(driver):
             except:
                 pass
 
+def warm_driver_pool():
+    """Start INITIAL_WORKERS drivers up front so the first requests don't pay Chrome startup"""
+    for _ in range(INITIAL_WORKERS):
+        driver = setup_selenium_driver()
+        if driver:
+            with driver_lock:
+                driver_pool.append((driver, time.time()))
+    logger.info("Driver pool warmed with %s drivers", len(driver_pool))
+
 def cleanup_driver_pool():
     """Clean up all drivers in the pool"""
     with driver_lock:
         while driver_pool:
-            driver = driver_pool.pop()
+            driver, _ = driver_pool.pop()
             try:
                 driver.quit()
             except:
                 pass
 
 # --- URL Processing Functions ---
+@lru_cache(maxsize=4096)
 def extract_clean_url(redirect_url):
     """Parse YouTube redirect URL to extract destination URL"""
     try:
@@ -298,58 +504,56 @@ def extract_clean_url(redirect_url):
         if 'q' in query_params:
             return unquote(query_params['q'][0])
     except Exception as e:
-        logger.debug(f"Error parsing redirect URL: {e}")
+        logger.debug("Error parsing redirect URL: %s", e)
     return None
 
+@lru_cache(maxsize=4096)
 def is_valid_external_url(url):
     """Validate that URL is external and not YouTube internal"""
     if not url or not url.startswith('http'):
         return False
     
-    exclude_domains = [
-        'youtube.com', 'youtu.be', 'googleapis.com', 'googleusercontent.com',
-        'gstatic.com', 'google.com', 'googlevideo.com'
-    ]
-    
     try:
-        domain = urlparse(url).netloc.lower().replace('www.', '')
-        return not any(excluded in domain for excluded in exclude_domains)
-    except:
+        domain = urlparse(url).hostname or ''
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        # Exact host or a subdomain of it; a single C-level endswith over all suffixes
+        return bool(domain) and domain not in EXCLUDED_DOMAINS and not domain.endswith(EXCLUDED_DOMAIN_SUFFIXES)
+    except ValueError:
         return False
 
-def find_links_in_json_enhanced(data, path=""):
-    """Enhanced recursive search for links in JSON data"""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            current_path = f"{path}.{key}" if path else key
-            
-            if key in ['aboutChannelViewModel', 'channelMetadataRenderer', 'c4TabbedHeaderRenderer']:
-                try:
-                    if 'links' in value:
-                        return value.get('links', [])
-                    elif 'headerLinks' in value:
-                        return value.get('headerLinks', [])
-                    elif 'customLinks' in value:
-                        return value.get('customLinks', [])
-                except (KeyError, TypeError):
-                    continue
-            
-            if key in ['contents', 'tabs', 'metadata', 'header'] and isinstance(value, (dict, list)):
-                found = find_links_in_json_enhanced(value, current_path)
-                if found:
-                    return found
-            
-            if isinstance(value, (dict, list)):
-                found = find_links_in_json_enhanced(value, current_path)
-                if found:
-                    return found
-                    
-    elif isinstance(data, list):
-        for i, item in enumerate(data):
-            if isinstance(item, (dict, list)):
-                found = find_links_in_json_enhanced(item, f"{path}[{i}]")
-                if found:
-                    return found
+def find_links_in_json_enhanced(data):
+    """Iterative depth-first search for the first non-empty links array in JSON data"""
+    # Items are pushed in reverse so they are visited in document order
+    stack = [(None, data)]
+    while stack:
+        key, value = stack.pop()
+        
+        if key in LINK_CONTAINER_KEYS and isinstance(value, dict):
+            for links_key in LINK_ARRAY_KEYS:
+                links = value.get(links_key)
+                if links:
+                    return links
+        
+        if isinstance(value, dict):
+            stack.extend(item for item in reversed(value.items()) if isinstance(item[1], (dict, list)))
+        elif isinstance(value, list):
+            stack.extend((None, item) for item in reversed(value) if isinstance(item, (dict, list)))
+    return None
+
+def find_first_string(data, keys):
+    """Depth-first search for the first non-empty string stored under any of keys"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key in keys:
+                value = node.get(key)
+                if isinstance(value, str) and value:
+                    return value
+            stack.extend(value for value in reversed(node.values()) if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(item for item in reversed(node) if isinstance(item, (dict, list)))
     return None
 
 def parse_links_from_json(links_data):
@@ -384,76 +588,158 @@ def parse_links_from_json(links_data):
                               .get('url'))
             else:
                 # Generic search for title and URL
-                def find_text(obj):
-                    if isinstance(obj, dict):
-                        for key in ['content', 'simpleText', 'text', 'title']:
-                            if key in obj and isinstance(obj[key], str):
-                                return obj[key]
-                        for value in obj.values():
-                            result = find_text(value)
-                            if result:
-                                return result
-                    return None
-                
-                def find_url(obj):
-                    if isinstance(obj, dict):
-                        for key in ['url', 'href']:
-                            if key in obj and isinstance(obj[key], str):
-                                return obj[key]
-                        for value in obj.values():
-                            result = find_url(value)
-                            if result:
-                                return result
-                    return None
-                
-                title = find_text(link_item) or 'Link'
-                redirect_url = find_url(link_item)
+                title = find_first_string(link_item, TITLE_KEYS) or 'Link'
+                redirect_url = find_first_string(link_item, URL_KEYS)
             
             if redirect_url:
                 clean_url = extract_clean_url(redirect_url) if '/redirect?' in redirect_url else redirect_url
                 if clean_url and is_valid_external_url(clean_url):
-                    extracted_links.append({'title': title, 'url': clean_url})
+                    extracted_links.append(LinkRecord(title, clean_url))
                     
         except (KeyError, IndexError, TypeError):
             continue
     
     return extracted_links
 
-def extract_links_multiple_methods(driver, channel_url):
-    """Try multiple methods to extract links"""
-    html_content = driver.page_source
-    
-    # Method 1: Enhanced ytInitialData patterns
-    enhanced_patterns = [
-        r'var ytInitialData = (\{.*?\});</script>',
-        r'window\["ytInitialData"\] = (\{.*?\});',
-        r'ytInitialData\s*=\s*(\{.*?\});',
-        r'window\.ytInitialData\s*=\s*(\{.*?\});',
-    ]
-    
-    for pattern in enhanced_patterns:
-        match = re.search(pattern, html_content, re.DOTALL)
-        if match:
+def slice_json_after(html_content, anchor):
+    """Return the brace-balanced JSON object that directly follows anchor, or None"""
+    anchor_pos = html_content.find(anchor)
+    if anchor_pos == -1:
+        return None
+    
+    start = anchor_pos + len(anchor)
+    while start < len(html_content) and html_content[start].isspace():
+        start += 1
+    if start >= len(html_content) or html_content[start] != '{':
+        return None
+    
+    # Single linear pass: only braces, quotes and backslashes are visited
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    for match in JSON_TOKEN_PATTERN.finditer(html_content, start):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        
+        char = match.group()
+        if char == '\\':
+            if in_string:
+                escaped_pos = pos + 1
+        elif char == '"':
+            in_string = not in_string
+        elif not in_string:
+            if char == '{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return html_content[start:pos + 1]
+    
+    return None
+
+def extract_links_from_html(html_content):
+    """Extract links from the ytInitialData embedded in raw HTML, or None if absent"""
+    for anchor in YT_INITIAL_DATA_ANCHORS:
+        json_text = slice_json_after(html_content, anchor)
+        if json_text:
             try:
-                json_text = match.group(1)
-                data = json.loads(json_text)
+                data = json_loads(json_text)
                 links_data = find_links_in_json_enhanced(data)
                 if links_data:
                     return parse_links_from_json(links_data), "Success (Enhanced JSON method)"
             except json.JSONDecodeError:
                 continue
+    return None
+
+def fetch_about_html_fast(about_url):
+    """Fetch the About page HTML over plain HTTP, or None on failure"""
+    try:
+        response = http_session.get(
+            about_url,
+            headers={'User-Agent': random.choice(USER_AGENTS)},
+            timeout=HTTP_TIMEOUT
+        )
+        if response.status_code == 429:
+            handle_rate_limit_response(is_blocked=True, host=rate_limit_host(about_url))
+            return None
+        if response.status_code == 200:
+            return response.text
+    except requests.RequestException as e:
+        logger.debug("HTTP fast path failed for %s: %s", about_url, e)
+    return None
+
+async def fetch_about_html_async(session, sem, about_url):
+    """Fetch one About page over aiohttp under the shared rate limiter, or None on failure"""
+    async with sem:
+        # The limiter sleeps, so run it off the event loop
+        host = rate_limit_host(about_url)
+        await asyncio.to_thread(smart_rate_limit, host)
+        try:
+            async with session.get(about_url, headers={'User-Agent': random.choice(USER_AGENTS)}) as response:
+                if response.status == 429:
+                    handle_rate_limit_response(is_blocked=True, host=host)
+                    return None
+                if response.status == 200:
+                    return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug("Async fetch failed for %s: %s", about_url, e)
+    return None
+
+async def prefetch_links_async(channel_urls):
+    """Fetch About pages concurrently and return {channel_url: links} for pages whose static HTML had links"""
+    sem = asyncio.Semaphore(MAX_WORKERS)
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=MAX_WORKERS)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector,
+                                     headers={'Accept-Language': 'en-US,en;q=0.9'}) as session:
+        pages = await asyncio.gather(*(
+            fetch_about_html_async(session, sem, url.rstrip('/') + '/about') for url in channel_urls
+        ))
+    
+    prefetched = {}
+    for channel_url, html_content in zip(channel_urls, pages):
+        if html_content and 'ytInitialData' in html_content:
+            result = extract_links_from_html(html_content)
+            if result:
+                handle_rate_limit_response(is_blocked=False, host=rate_limit_host(channel_url))
+                prefetched[channel_url] = result[0]
+    
+    # Same key and value shape as cache_result on get_links_from_channel_url_optimized, so later lookups hit
+    with cache_lock:
+        for channel_url, links in prefetched.items():
+            url_cache[channel_url] = (links, "Success (HTTP fast path)")
+    return prefetched
+
+def extract_links_multiple_methods(driver, channel_url, html_content):
+    """Try multiple methods to extract links, starting from the page source the caller already read"""
+    # Method 1: Enhanced ytInitialData extraction from the HTML we already have, no WebDriver round trip
+    result = extract_links_from_html(html_content)
+    if result:
+        return result
+    
+    # Method 1b: Read ytInitialData from the page's JS context, in case it was set after the HTML was served
+    try:
+        raw_data = driver.execute_script(
+            "return window.ytInitialData ? JSON.stringify(window.ytInitialData) : null"
+        )
+    except WebDriverException:
+        raw_data = None
+    
+    if raw_data:
+        try:
+            links_data = find_links_in_json_enhanced(json_loads(raw_data))
+            if links_data:
+                return parse_links_from_json(links_data), "Success (JS extraction)"
+        except json.JSONDecodeError:
+            pass
     
     # Method 2: Direct DOM element extraction
-    link_selectors = [
-        'a[href*="/redirect?"]',
-        'a[href*="youtube.com/redirect"]',
-        '[data-target-new-window="true"]',
-        '.channel-external-link',
-        '.ytd-channel-external-link-view-model',
-        'yt-formatted-string a[href^="http"]'
-    ]
-    
-    for selector in link_selectors:
+    for selector, marker in DOM_LINK_SELECTORS:
+        # Skip the WebDriver round trip when the page source cannot match the selector
+        if marker not in html_content:
+            continue
+        
         try:
             link_elements = driver.find_elements(By.CSS_SELECTOR, selector)
             if link_elements:
@@ -469,9 +755,9 @@ def extract_links_multiple_methods(driver, channel_url):
                             if '/redirect?' in href or 'youtube.com/redirect' in href:
                                 clean_url = extract_clean_url(href)
                                 if clean_url and is_valid_external_url(clean_url):
-                                    extracted_links.append({'title': text, 'url': clean_url})
+                                    extracted_links.append(LinkRecord(text, clean_url))
                             elif href.startswith('http') and 'youtube.com' not in href:
-                                extracted_links.append({'title': text, 'url': href})
+                                extracted_links.append(LinkRecord(text, href))
                     except Exception:
                         continue
                 
@@ -484,17 +770,27 @@ def extract_links_multiple_methods(driver, channel_url):
 
 @cache_result()
 @circuit_breaker
-def get_links_from_channel_url_optimized(channel_url):
+def get_links_from_channel_url_optimized(channel_url, try_http=True):
     """Optimized version with caching and circuit breaker"""
     if not isinstance(channel_url, str) or not channel_url.startswith('http'):
         return [], f"Invalid channel URL: {channel_url}"
         
     about_url = channel_url.rstrip('/') + '/about'
     driver = None
+    driver_ok_ts = 0
+    host = rate_limit_host(about_url)
     
     try:
         # Apply smart rate limiting
-        smart_rate_limit()
+        smart_rate_limit(host)
+        
+        # Fast path: ytInitialData is already in the initial HTML, no browser needed
+        html_content = fetch_about_html_fast(about_url) if try_http else None
+        if html_content and 'ytInitialData' in html_content:
+            result = extract_links_from_html(html_content)
+            if result:
+                handle_rate_limit_response(is_blocked=False, host=host)
+                return result[0], "Success (HTTP fast path)"
         
         # Get driver from pool
         driver = get_driver()
@@ -524,26 +820,43 @@ def get_links_from_channel_url_optimized(channel_url):
         except TimeoutException:
             return [], "Page load timeout"
         
+        # One page_source round trip serves both block detection and extraction
+        html_content = driver.page_source
+        
         # Check for rate limiting
-        page_source_lower = driver.page_source.lower()
-        if any(phrase in page_source_lower for phrase in ["unusual traffic", "blocked", "captcha", "robot"]):
-            handle_rate_limit_response(is_blocked=True)
+        if BLOCK_PATTERN.search(html_content):
+            handle_rate_limit_response(is_blocked=True, host=host)
             return [], "Rate limited by YouTube"
         
         # Extract links
-        links, message = extract_links_multiple_methods(driver, channel_url)
+        links, message = extract_links_multiple_methods(driver, channel_url, html_content)
         
         # Update rate limiter on success
-        handle_rate_limit_response(is_blocked=False)
+        handle_rate_limit_response(is_blocked=False, host=host)
+        driver_ok_ts = time.time()
         
         return links, message
         
     except Exception as e:
-        handle_rate_limit_response(is_blocked=True)
+        handle_rate_limit_response(is_blocked=True, host=host)
         return [], f"Error: {str(e)}"
     finally:
         # Return driver to pool
-        return_driver(driver)
+        return_driver(driver, driver_ok_ts)
+
+def get_link_category(url):
+    """Return the social media category for a URL's host (or any parent domain), else None"""
+    try:
+        host = urlparse(url).hostname or ''
+    except ValueError:
+        return None
+    
+    labels = host.split('.')
+    for i in range(len(labels) - 1):
+        category = KEYWORD_TO_CATEGORY.get('.'.join(labels[i:]))
+        if category:
+            return category
+    return None
 
 def categorize_links(links):
     """Categorize links into social media and other categories"""
@@ -551,40 +864,57 @@ def categorize_links(links):
     categorized_links = {col: [] for col in new_columns}
     
     for link in links:
-        url = link.get('url', '').lower()
-        found_category = False
-        
-        for category, keywords in SOCIAL_MEDIA_KEYWORDS.items():
-            if any(keyword in url for keyword in keywords):
-                categorized_links[category].append(link['url'])
-                found_category = True
-                break
-        
-        if not found_category:
-            categorized_links['Other Links'].append(link['url'])
+        category = get_link_category(link.url) or 'Other Links'
+        categorized_links[category].append(link.url)
     
     return categorized_links, new_columns
 
+def categorize_link_frame(scraped_links):
+    """
+    Categorize every scraped link in one vectorized pass over a long (row, url) frame.
+    Returns one row of comma-joined URLs per DataFrame index, with the first other link as Website.
+    """
+    new_columns = ['Website'] + list(SOCIAL_MEDIA_KEYWORDS.keys()) + ['Other Links']
+    pairs = [(index, link.url) for index, links in scraped_links.items() for link in links]
+    if not pairs:
+        return pd.DataFrame(columns=new_columns)
+    
+    all_links = pd.DataFrame(pairs, columns=['row', 'url'])
+    all_links['category'] = 'Other Links'
+    for category, pattern in CATEGORY_URL_PATTERNS.items():
+        mask = all_links['url'].str.contains(pattern, na=False)
+        all_links.loc[mask, 'category'] = category
+    
+    # Promote each row's first uncategorized link to Website
+    other = all_links['category'] == 'Other Links'
+    first_other = other & ~all_links['row'].where(other).duplicated()
+    all_links.loc[first_other, 'category'] = 'Website'
+    
+    categorized = all_links.groupby(['row', 'category'], sort=False)['url'].agg(', '.join).unstack('category')
+    return categorized.reindex(columns=new_columns).fillna('')
+
 def process_single_url(url_data):
     """Process a single URL - designed for concurrent execution"""
     index, channel_url = url_data
     
     try:
-        logger.info(f"Processing URL {index + 1}: {channel_url}")
+        logger.info("Processing URL %s: %s", index + 1, channel_url)
         
-        if pd.isna(channel_url) or not str(channel_url).strip():
+        if channel_url is None or channel_url is pd.NA or (isinstance(channel_url, float) and channel_url != channel_url) \
+                or not str(channel_url).strip():
             return index, None, "Empty URL"
         
-        links, message = get_links_from_channel_url_optimized(str(channel_url))
+        # Batch processing already tried plain HTTP in prefetch_links_async
+        links, message = get_links_from_channel_url_optimized(str(channel_url), try_http=False)
         
+        # Categorization happens once for the whole batch in categorize_link_frame
         if links:
-            categorized_links, _ = categorize_links(links)
-            return index, categorized_links, message
+            return index, links, message
         else:
             return index, None, message
             
     except Exception as e:
-        logger.error(f"Error processing URL {index + 1}: {str(e)}")
+        logger.error("Error processing URL %s: %s", index + 1, e)
         return index, None, str(e)
 
 def process_dataframe_concurrent(df, url_column_name, max_rows=None):
@@ -613,44 +943,94 @@ def process_dataframe_concurrent(df, url_column_name, max_rows=None):
     errors = []
     
     # Prepare data for concurrent processing
-    url_data = [(index, row[url_column_name]) for index, row in df.iterrows()]
+    # Pair index labels with the raw column array; no per-row Series is built
+    url_data = list(zip(df.index, df[url_column_name].to_numpy()))
+    scraped_links = {}
+    
+    # Most About pages carry ytInitialData in their static HTML, so fetch them all over aiohttp first.
+    # Channels already in url_cache are never refetched; cached misses resolve from the cache in the Selenium step
+    channel_urls = {
+        url for _, url in url_data if isinstance(url, str) and url.startswith('http')
+    }
+    with cache_lock:
+        cached = {url: url_cache.get(url) for url in channel_urls}
+    uncached_urls = [url for url, entry in cached.items() if entry is None]
+    prefetched = asyncio.run(prefetch_links_async(uncached_urls)) if uncached_urls else {}
+    prefetched.update((url, entry[0]) for url, entry in cached.items() if entry is not None and entry[0])
+    
+    # Group the rest by URL so a channel listed several times is only scraped once
+    rows_by_url = defaultdict(list)
+    for index, channel_url in url_data:
+        links = prefetched.get(channel_url) if isinstance(channel_url, str) else None
+        if links:
+            scraped_links[index] = links
+            processed += 1
+        else:
+            rows_by_url[channel_url].append(index)
+    url_data = [(indices[0], channel_url) for channel_url, indices in rows_by_url.items()]
+    duplicate_rows = {indices[0]: indices for indices in rows_by_url.values()}
+    logger.info("Async HTTP resolved %s/%s rows; %s unique URLs left for Selenium", processed, total_rows, len(url_data))
     
-    # Process URLs concurrently
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_url = {executor.submit(process_single_url, url_info): url_info for url_info in url_data}
+    # Process the rest concurrently with Selenium. The number of rows in flight follows an AIMD window:
+    # halved when YouTube throttles us, grown by AIMD_INCREASE after a window of fast results
+    work = iter(url_data)
+    pending = {}
+    exhausted = False
+    concurrency = float(INITIAL_WORKERS)
+    latencies = deque(maxlen=AIMD_WINDOW)
+    throttled = False
+    
+    while True:
+        while not exhausted and len(pending) < int(concurrency):
+            url_info = next(work, None)
+            if url_info is None:
+                exhausted = True
+            else:
+                pending[scrape_executor.submit(process_single_url, url_info)] = time.monotonic()
+        
+        if not pending:
+            break
         
-        for future in as_completed(future_to_url):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            latencies.append(time.monotonic() - pending.pop(future))
             try:
-                index, categorized_links, message = future.result()
-                processed += 1
+                index, links, message = future.result()
+                indices = duplicate_rows[index]
+                processed += len(indices)
                 
-                logger.info(f"Completed {processed}/{total_rows}")
+                logger.info("Completed %s/%s", processed, total_rows)
                 
-                if categorized_links:
-                    # Assign links to appropriate columns
-                    for col in new_columns:
-                        link_list = categorized_links.get(col, [])
-                        if col == 'Other Links' and not df.at[index, 'Website']:
-                            if link_list:
-                                df.at[index, 'Website'] = str(link_list.pop(0))
-                        
-                        df.at[index, col] = str(', '.join(link_list))
+                if links:
+                    for row_index in indices:
+                        scraped_links[row_index] = links
                 else:
+                    if any(signal in message for signal in THROTTLE_MESSAGES):
+                        throttled = True
                     if "No links found" not in message:
                         errors.append(f"Row {index + 1}: {message}")
-                
-                # Periodic garbage collection
-                if processed % 10 == 0:
-                    gc.collect()
                     
             except Exception as e:
                 errors.append(f"Future error: {str(e)}")
                 processed += 1
+                throttled = True
+        
+        if throttled:
+            concurrency = max(MIN_WORKERS, concurrency / 2)
+            latencies.clear()
+            throttled = False
+            logger.info("Concurrency window reduced to %s", int(concurrency))
+        elif len(latencies) == AIMD_WINDOW:
+            if sum(latencies) / AIMD_WINDOW < AIMD_TARGET_LATENCY:
+                concurrency = min(MAX_WORKERS, concurrency + AIMD_INCREASE)
+            latencies.clear()
     
-    # Cleanup
-    cleanup_driver_pool()
-    gc.collect()
+    # Categorize all scraped links together, then write them back in one block assignment
+    categorized = categorize_link_frame(scraped_links)
+    if not categorized.empty:
+        df.loc[categorized.index, new_columns] = categorized[new_columns].to_numpy()
     
+    # Drivers stay pooled for the next batch; cleanup_on_exit quits them
     logger.info("Processing complete!")
     
     if errors:
@@ -686,10 +1066,66 @@ def detect_url_column(df):
     
     return None
 
+def dedupe_column_names(names):
+    """Rename repeated column names to name.1, name.2, ... like pandas.read_csv does"""
+    seen = set(names)
+    counts = {}
+    deduped = []
+    for name in names:
+        if name not in counts:
+            counts[name] = 0
+            deduped.append(name)
+            continue
+        while True:
+            counts[name] += 1
+            candidate = f"{name}.{counts[name]}"
+            if candidate not in seen:
+                break
+        seen.add(candidate)
+        deduped.append(candidate)
+    return deduped
+
+def track_processed_file(path):
+    """Remember a result file for /download, deleting the oldest ones past MAX_PROCESSED_FILES"""
+    with processed_files_lock:
+        processed_files[path] = time.time()
+        evicted = []
+        while len(processed_files) > MAX_PROCESSED_FILES:
+            evicted.append(processed_files.popitem(last=False)[0])
+    
+    for old_path in evicted:
+        try:
+            os.unlink(old_path)
+        except OSError as e:
+            logger.debug("Could not remove %s: %s", old_path, e)
+
+def write_excel_file(df, output):
+    """Write a DataFrame to xlsx with xlsxwriter in constant_memory mode, one row at a time"""
+    # constant_memory flushes each finished row, so rows must be written in order;
+    # DataFrame.to_excel emits cells column by column and would drop data in this mode
+    # Links stay plain strings: as hyperlinks, long URLs and anything past Excel's 65,530 links per sheet are dropped.
+    # nan_inf_to_errors writes ±inf as #DIV/0! instead of raising. Dates get a visible format, and tz-aware
+    # timestamps are written as their wall-clock time because Excel has no timezones
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'strings_to_urls': False,
+        'nan_inf_to_errors': True,
+        'default_date_format': EXCEL_DATE_FORMAT,
+        'remove_timezone': True
+    })
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, [str(col) for col in df.columns])
+    
+    # Missing values become blank cells; xlsxwriter rejects NaN
+    values = df.astype(object).where(df.notna(), None)
+    for row_number, row in enumerate(values.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row_number, 0, row)
+    
+    workbook.close()
+
 # --- Flask Routes ---
-@app.route('/')
-def index():
-    return '''
+# The landing page never changes at runtime, so encode it and derive its ETag once
+INDEX_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -730,6 +1166,11 @@ def index():
                                     <input type="number" class="form-control" id="max_rows" name="max_rows" min="1" max="100" placeholder="e.g., 20">
                                     <small class="text-muted">Recommended: 10-30 rows for optimal performance</small>
                                 </div>
+                                <div class="mb-3 form-check">
+                                    <input type="checkbox" class="form-check-input" id="url_only" name="url_only" value="1">
+                                    <label for="url_only" class="form-check-label">Only keep the URL column</label>
+                                    <small class="text-muted d-block">Requires a URL column name; other columns are skipped while reading and left out of the result</small>
+                                </div>
                                 <button type="submit" class="btn btn-primary btn-lg">
                                     <i class="bi bi-upload"></i> Upload and Process
                                 </button>
@@ -782,6 +1223,49 @@ def index():
     </body>
     </html>
     '''
+INDEX_HTML_BYTES = INDEX_HTML.encode('utf-8')
+INDEX_ETAG = hashlib.sha1(INDEX_HTML_BYTES).hexdigest()
+
+# The landing page is compressed once here and handed out as-is per Accept-Encoding; br is preferred on ties
+INDEX_HTML_ENCODED = {}
+if brotli is not None:
+    INDEX_HTML_ENCODED['br'] = brotli.compress(INDEX_HTML_BYTES, quality=11)
+INDEX_HTML_ENCODED['gzip'] = gzip.compress(INDEX_HTML_BYTES, 9)
+
+# Endpoints that scrape YouTube and should be refused while we are backing off
+SCRAPE_ENDPOINTS = frozenset({'upload_file', 'test_single_url'})
+
+@app.before_request
+def reject_while_backing_off():
+    """Answer scrape requests with 429 and Retry-After while the circuit is open or a host is blocked"""
+    if request.endpoint not in SCRAPE_ENDPOINTS:
+        return None
+    retry_after = scrape_retry_after()
+    if not retry_after:
+        return None
+    response = jsonify({
+        'ok': False,
+        'code': 'agent.rate_limited',
+        'message': f'YouTube is rate limiting requests. Retry in {retry_after} seconds.'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.route('/')
+def index():
+    encoding = request.accept_encodings.best_match(list(INDEX_HTML_ENCODED))
+    if encoding:
+        response = Response(INDEX_HTML_ENCODED[encoding], mimetype='text/html')
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{INDEX_ETAG}-{encoding}')
+    else:
+        response = Response(INDEX_HTML_BYTES, mimetype='text/html')
+        response.set_etag(INDEX_ETAG)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -795,16 +1279,48 @@ def upload_file():
     try:
         # Get parameters
         url_column = request.form.get('url_column', '').strip()
-        max_rows = request.form.get('max_rows', '')
-        max_rows = int(max_rows) if max_rows.isdigit() else None
-        
-        # Read file based on extension
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file)
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file)
-        else:
-            return jsonify({'error': 'Unsupported file format. Please use CSV or Excel files.'}), 400
+        # Non-positive or unparsable limits mean "process everything"
+        try:
+            max_rows = int(request.form.get('max_rows', '').strip())
+        except ValueError:
+            max_rows = None
+        if max_rows is not None and max_rows <= 0:
+            max_rows = None
+        
+        # With a named URL column, url_only parses just that column; the others are never read
+        usecols = [url_column] if url_column and request.form.get('url_only') else None
+        
+        # Read file based on extension; rows past max_rows would be discarded, so never parse them
+        try:
+            if file.filename.endswith('.csv'):
+                if max_rows:
+                    # The pyarrow engine cannot stop after nrows
+                    df = pd.read_csv(file, nrows=max_rows, usecols=usecols)
+                elif pacsv is not None:
+                    # Parse straight from the upload stream in 1 MiB blocks across threads
+                    # newlines_in_values lets quoted multi-line cells straddle block boundaries
+                    table = pacsv.read_csv(
+                        file.stream,
+                        read_options=pacsv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+                        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+                        convert_options=pacsv.ConvertOptions(include_columns=usecols or [])
+                    )
+                    # Arrow keeps repeated header names as-is; rename them the way pandas does
+                    table = table.rename_columns(dedupe_column_names(table.column_names))
+                    # self_destruct frees each Arrow column as its pandas column is built
+                    df = table.to_pandas(self_destruct=True)
+                    del table
+                else:
+                    df = pd.read_csv(file, usecols=usecols)
+            elif file.filename.endswith(('.xlsx', '.xls')):
+                df = pd.read_excel(file, engine='calamine', nrows=max_rows or None, usecols=usecols)
+            else:
+                return jsonify({'error': 'Unsupported file format. Please use CSV or Excel files.'}), 400
+        except (ValueError, KeyError) as e:
+            # pandas raises ValueError and Arrow KeyError when usecols names a column the file does not have
+            if usecols is None:
+                raise
+            return jsonify({'error': f"Column '{url_column}' not found: {str(e)}"}), 400
         
         if df.empty:
             return jsonify({'error': 'The uploaded file is empty'}), 400
@@ -818,7 +1334,7 @@ def upload_file():
                     'available_columns': list(df.columns)
                 }), 400
         
-        logger.info(f"Processing file: {file.filename}, URL column: {url_column}, Max rows: {max_rows}")
+        logger.info("Processing file: %s, URL column: %s, Max rows: %s", file.filename, url_column, max_rows)
         
         # Process the dataframe
         processed_df, error_message = process_dataframe_concurrent(df, url_column, max_rows)
@@ -826,10 +1342,22 @@ def upload_file():
         if processed_df is None:
             return jsonify({'error': error_message}), 400
         
-        # Save to BytesIO for download
-        output = BytesIO()
-        processed_df.to_excel(output, index=False, engine='openpyxl')
-        output.seek(0)
+        # Browsers posting the form get the workbook in this response; nothing is kept for a second request
+        wants_json = request.args.get('mode') == 'json' or request.accept_mimetypes.best == 'application/json'
+        if not wants_json:
+            # Spool to an anonymous temp file rather than RAM; it disappears when the response closes it
+            output = tempfile.TemporaryFile(suffix='.xlsx')
+            write_excel_file(processed_df, output)
+            output.seek(0)
+            response = send_file(
+                output,
+                as_attachment=True,
+                download_name=f'processed_youtube_links_{int(time.time())}.xlsx',
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+            if error_message:
+                response.headers['X-Processing-Warnings'] = error_message
+            return response
         
         # Create response
         response_data = {
@@ -844,9 +1372,9 @@ def upload_file():
             response_data['warnings'] = error_message
         
         # Store the file for download (in production, use proper storage)
-        import tempfile
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-        processed_df.to_excel(temp_file.name, index=False, engine='openpyxl')
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
+            write_excel_file(processed_df, temp_file)
+        track_processed_file(temp_file.name)
         
         # Return success response with download link
         response_data['download_url'] = f'/download/{os.path.basename(temp_file.name)}'
@@ -854,50 +1382,53 @@ def upload_file():
         return jsonify(response_data)
         
     except Exception as e:
-        logger.error(f"Error processing file: {str(e)}")
+        logger.error("Error processing file: %s", e)
         return jsonify({'error': f'Error processing file: {str(e)}'}), 500
 
 @app.route('/download/<filename>')
 def download_file(filename):
     """Download processed file"""
     try:
-        temp_path = os.path.join(tempfile.gettempdir(), filename)
-        if os.path.exists(temp_path):
-            return send_file(
-                temp_path,
-                as_attachment=True,
-                download_name=f'processed_youtube_links_{int(time.time())}.xlsx',
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:
+        # Only names this process wrote are served; the in-memory registry replaces an exists() check
+        safe_name = secure_filename(filename)
+        temp_dir = tempfile.gettempdir()
+        if os.path.join(temp_dir, safe_name) not in processed_files:
             return jsonify({'error': 'File not found'}), 404
+        return send_from_directory(
+            temp_dir,
+            safe_name,
+            as_attachment=True,
+            download_name=f'processed_youtube_links_{int(time.time())}.xlsx',
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    except NotFound:
+        return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         return jsonify({'error': f'Download error: {str(e)}'}), 500
 
 @app.route('/status')
 def get_status():
     """Get current processing status"""
+    # One consistent snapshot of the per-host limiters; the lock is never held across a sleep
     with rate_limiter_lock:
-        current_delay = rate_limiter_state['current_delay']
-        consecutive_failures = rate_limiter_state['consecutive_failures']
-        blocked_until = rate_limiter_state['blocked_until']
-    
-    with circuit_breaker_lock:
-        circuit_open = circuit_breaker_state['is_open']
-        circuit_failures = circuit_breaker_state['failures']
-    
-    with cache_lock:
-        cache_size = len(url_cache)
+        limiters = {host: dict(state) for host, state in rate_limiter_state.items()}
+    now = time.time()
     
-    with driver_lock:
-        active_drivers = len(driver_pool)
+    # Single reads are atomic under the GIL; driver_lock in particular can be held through a Chrome start
+    circuit_open = circuit_open_event.is_set()
+    circuit_failures = circuit_breaker_state['failures']
+    cache_size = len(url_cache)
+    active_drivers = len(driver_pool)
     
     return jsonify({
         'rate_limiter': {
-            'current_delay': current_delay,
-            'consecutive_failures': consecutive_failures,
-            'is_blocked': time.time() < blocked_until,
-            'blocked_until': blocked_until
+            host: {
+                'current_delay': state['current_delay'],
+                'consecutive_failures': state['consecutive_failures'],
+                'is_blocked': now < state['blocked_until'],
+                'blocked_until': state['blocked_until']
+            }
+            for host, state in limiters.items()
         },
         'circuit_breaker': {
             'is_open': circuit_open,
@@ -947,7 +1478,7 @@ def test_single_url():
             'links_found': len(links),
             'processing_time': round(processing_time, 2),
             'message': message,
-            'links': links,
+            'links': [link._asdict() for link in links],
             'categorized': categorized_links
         })
         
@@ -973,36 +1504,51 @@ import atexit
 def cleanup_on_exit():
     """Clean up resources on application shutdown"""
     logger.info("Cleaning up resources...")
+    scrape_executor.shutdown(wait=False)
     cleanup_driver_pool()
     
     # Clear cache
     with cache_lock:
         url_cache.clear()
     
+    # Remove result files that were never downloaded
+    with processed_files_lock:
+        paths = list(processed_files)
+        processed_files.clear()
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    
     logger.info("Cleanup complete")
 
 atexit.register(cleanup_on_exit)
 
+# Move everything allocated at import into the permanent generation so collections skip it
+gc.freeze()
+
 # --- Main Application ---
 if __name__ == '__main__':
-    import tempfile
-    
     # Ensure temp directory exists
     os.makedirs(tempfile.gettempdir(), exist_ok=True)
     
-    # Configure Flask
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-    
     # Log startup information
     logger.info("=" * 50)
     logger.info("🚀 Optimized YouTube Channel Links Scraper")
     logger.info("=" * 50)
-    logger.info(f"Max concurrent workers: {MAX_WORKERS}")
-    logger.info(f"Driver pool size: {DRIVER_POOL_SIZE}")
-    logger.info(f"Rate limiting: {INITIAL_DELAY}s - {MAX_DELAY}s")
-    logger.info(f"Cache expiry: {CACHE_EXPIRY}s")
-    logger.info(f"Circuit breaker threshold: {CIRCUIT_BREAKER_THRESHOLD}")
+    logger.info("Concurrent workers: %s-%s (starting at %s)", MIN_WORKERS, MAX_WORKERS, INITIAL_WORKERS)
+    logger.info("Driver pool size: %s", DRIVER_POOL_SIZE)
+    logger.info("Rate limiting: %ss - %ss", INITIAL_DELAY, MAX_DELAY)
+    logger.info("Cache expiry: %ss", CACHE_EXPIRY)
+    logger.info("Circuit breaker threshold: %s", CIRCUIT_BREAKER_THRESHOLD)
     logger.info("=" * 50)
     
-    # Start the Flask application
-    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
+    # Serve through gunicorn with the same config as deployments; its post_worker_init hook warms the drivers
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    os.execv(sys.executable, [
+        sys.executable, '-m', 'gunicorn',
+        '--config', os.path.join(app_dir, 'gunicorn.conf.py'),
+        '--chdir', app_dir,
+        'app:app'
+    ])
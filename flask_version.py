@@ -3,16 +3,40 @@ Flask version of the YouTube Links Scraper
 This version can be deployed to platforms that support Selenium but may not work well with Streamlit
 """
 
-from flask import Flask, request, jsonify, render_template, send_file
+from flask import Flask, Response, request, jsonify, render_template, send_file, abort
+from werkzeug.utils import safe_join, secure_filename
 import pandas as pd
 import os
 import time
 import random
 import re
 import json
-from io import BytesIO
+import asyncio
+import queue
 from urllib.parse import urlparse, parse_qs, unquote
 import traceback
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+import gc
+import atexit
+import math
+import datetime
+import numbers
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+
+import aiohttp
+
+# Faster JSON decoding for large ytInitialData payloads when available
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 # Selenium imports
 from selenium import webdriver
@@ -35,9 +59,157 @@ SOCIAL_MEDIA_KEYWORDS = {
     'TikTok': ['tiktok.com'],
 }
 
-def setup_selenium_driver():
+# Flat domain -> category lookup so categorizing a link is a dict hit per host label
+KEYWORD_TO_CATEGORY = {
+    keyword: category
+    for category, keywords in SOCIAL_MEDIA_KEYWORDS.items()
+    for keyword in keywords
+}
+
+# --- Extraction patterns ---
+# Markers that precede the ytInitialData object, most specific first
+YT_INITIAL_DATA_ANCHORS = (
+    'var ytInitialData =',
+    'window["ytInitialData"] =',
+    'ytInitialData =',
+)
+
+# The only characters that matter when finding the end of the JSON object
+JSON_TOKEN_PATTERN = re.compile(r'[{}"\\]')
+
+# YouTube's block interstitial; matched case-insensitively without lowercasing a copy of the page
+BLOCK_PATTERN = re.compile(r'unusual traffic', re.IGNORECASE)
+
+# --- HTTP fetching ---
+MAX_CONCURRENCY = 5  # Simultaneous About page requests
+HTTP_TIMEOUT = 20  # Seconds per About page request
+HTTP_RETRIES = 2  # Extra attempts after a connection error or 5xx
+HTTP_BACKOFF = 1.0  # Seconds before the first retry, doubled for each one after
+# Pre-answered cookie consent so EU requests get the About page instead of the consent.youtube.com interstitial
+CONSENT_COOKIES = {'SOCS': 'CAI', 'CONSENT': 'YES+'}
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+]
+
+# --- Excel export ---
+# Fixed parts of a minimal single-sheet xlsx package
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+# Encode the fixed parts and the stylesheet once at import rather than for every workbook
+XLSX_STATIC_PARTS = {name: xml.encode('utf-8') for name, xml in XLSX_STATIC_PARTS.items()}
+XLSX_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+).encode('utf-8')
+XLSX_SHEET_FOOTER = b'</sheetData></worksheet>'
+XLSX_EMPTY_CELL = '<c/>'
+XLSX_BOOL_CELLS = {True: '<c t="b"><v>1</v></c>', False: '<c t="b"><v>0</v></c>'}
+# Dates are day serials counted from Excel's epoch and shown through cellXfs entry 1
+XLSX_EPOCH = datetime.datetime(1899, 12, 30)
+XLSX_DATE_CELL = '<c s="1"><v>{}</v></c>'
+
+# Control characters that are not allowed anywhere in an XML document
+XML_ILLEGAL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# --- Result cache ---
+RESULT_CACHE_SIZE = 32  # Processed DataFrames kept in memory for downloads
+RESULT_CACHE_MAX_ROWS = 100_000  # Larger results stay on disk only and downloads reload them
+
+# result_file -> processed DataFrame, least recently used first
+result_cache = OrderedDict()
+result_cache_lock = Lock()
+
+# --- Downloads ---
+ALLOWED_FORMATS = frozenset({'csv', 'excel'})
+RESULT_DIR = '/tmp/ytresults'  # Every result file lives here; downloads never leave it
+
+# --- Uploads ---
+UPLOAD_DIR = '/tmp/ytuploads'  # Uploads wait here between /upload and /process
+
+# Upload filename -> time it was saved; /process only reads, and only deletes, files listed here
+uploaded_files = {}
+uploaded_files_lock = Lock()
+
+# --- File cleanup ---
+# Small background pool so deleting spent files never holds up a request thread
+cleanup_pool = ThreadPoolExecutor(max_workers=2)
+FILE_TTL = 6 * 3600  # Seconds results and unprocessed uploads are kept on disk
+SWEEP_INTERVAL = 600  # Minimum seconds between scans for expired files
+
+# When the last sweep was scheduled, guarded by sweep_lock
+sweep_state = {'last_sweep': 0.0}
+sweep_lock = Lock()
+
+# --- Rate limiting ---
+INITIAL_RATE = 2.0  # Requests per second before any feedback
+MAX_RATE = 5.0  # Ceiling the rate recovers towards on success
+MIN_RATE = 0.05  # Floor after repeated blocking (one request per 20s)
+
+# --- Browser pool ---
+MAX_BROWSERS = 4  # Upper bound on Chrome instances for the Selenium fallback
+YT_DATA_WAIT = 5  # Seconds to wait for ytInitialData once the DOM is parsed
+# Requests Chrome refuses outright; ytInitialData is inline in the HTML, so none of these are needed
+BLOCKED_URL_PATTERNS = [
+    '*.jpg', '*.jpeg', '*.png', '*.webp', '*.gif', '*.woff*', '*.ttf', '*.mp4', '*.css',
+    '*doubleclick*', '*google-analytics*', '*googletagmanager*', '*fonts.gstatic*'
+]
+CHROME_PROFILE_DIR = '/tmp/chrome-profile-{}'
+
+# Profile directories currently held by a pool; Chrome refuses to share one between instances
+profile_slots_in_use = set()
+profile_slots_lock = Lock()
+
+def setup_selenium_driver(profile_dir=None):
     """Setup Chrome WebDriver with anti-detection options for containerized environment"""
     chrome_options = Options()
+    # driver.get returns at DOMContentLoaded instead of waiting for every subresource
+    chrome_options.page_load_strategy = 'eager'
     
     # Required for Docker/containerized environments
     chrome_options.add_argument("--headless")
@@ -52,13 +224,12 @@ def setup_selenium_driver():
     chrome_options.add_argument("--disable-plugins")
     chrome_options.add_argument("--disable-images")  # Speed up loading
     
+    # Reuse a profile directory so the HTTP/disk cache persists between scrapes
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    
     # User agent rotation
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    ]
-    chrome_options.add_argument(f"--user-agent={random.choice(user_agents)}")
+    chrome_options.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
     
     try:
         # For Docker deployment
@@ -73,35 +244,171 @@ def setup_selenium_driver():
         # Execute script to remove webdriver property
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
+        # --disable-images still downloads the bytes; refuse heavy assets and trackers at the network layer
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        except WebDriverException as e:
+            print(f"Could not configure CDP network blocking: {str(e)}")
+        
         return driver
     except Exception as e:
         print(f"Failed to setup Chrome WebDriver: {str(e)}")
         return None
 
-def find_links_in_json(data):
+class AdaptiveRateLimiter:
     """
-    Recursively searches through a nested dictionary/list structure to find the 'links' array.
+    Token bucket shared by all workers; halves its rate when YouTube pushes back and creeps up on success.
     """
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if key == 'aboutChannelViewModel':
-                try:
-                    return value.get('links', [])
-                except KeyError:
-                    return []
+    def __init__(self, rate=INITIAL_RATE, max_rate=MAX_RATE, min_rate=MIN_RATE):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self._lock = Lock()
+    
+    def reserve(self):
+        """Claim the next token and return how many seconds the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+    
+    def acquire(self):
+        """Block until a token is available"""
+        wait_time = self.reserve()
+        if wait_time:
+            time.sleep(wait_time)
+    
+    def on_429(self):
+        """Back off multiplicatively after a 429/CAPTCHA response"""
+        with self._lock:
+            self.rate = max(self.rate * 0.5, self.min_rate)
+            self.tokens = min(self.tokens, 0.0) - 1  # Make the next caller sit out a full interval
+        print(f"Rate limited - slowing down to {self.rate:.2f} requests/s")
+    
+    def on_success(self):
+        """Nudge the rate back up after a clean response"""
+        with self._lock:
+            self.rate = min(self.rate * 1.05, self.max_rate)
+
+rate_limiter = AdaptiveRateLimiter()
+
+class BrowserPool:
+    """
+    Lends headless Chrome drivers to worker threads, starting them on demand up to a fixed size.
+    Drivers outlive individual requests, so Chrome's startup cost is paid once per process.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._drivers = queue.Queue()
+        self._slot_of = {}  # driver -> profile slot it was started with
+        self._started = 0  # Drivers alive or being started, guarded by _lock
+        self._lock = Lock()
+    
+    def _spawn(self):
+        """Start a driver on a free profile slot, or return None if Chrome fails to start"""
+        with profile_slots_lock:
+            slot = 0
+            while slot in profile_slots_in_use:
+                slot += 1
+            profile_slots_in_use.add(slot)
+        
+        driver = setup_selenium_driver(profile_dir=CHROME_PROFILE_DIR.format(slot))
+        if driver is None:
+            with profile_slots_lock:
+                profile_slots_in_use.discard(slot)
+            return None
+        
+        with self._lock:
+            self._slot_of[driver] = slot
+        return driver
+    
+    def acquire(self):
+        """Borrow an idle driver, start a new one below the size limit, or wait until one is returned"""
+        while True:
+            try:
+                return self._drivers.get_nowait()
+            except queue.Empty:
+                pass
+            
+            with self._lock:
+                can_spawn = self._started < self.size
+                if can_spawn:
+                    self._started += 1
+            
+            if can_spawn:
+                driver = self._spawn()
+                if driver is None:
+                    with self._lock:
+                        self._started -= 1
+                return driver
             
-            if isinstance(value, (dict, list)):
-                found = find_links_in_json(value)
-                if found is not None:
-                    return found
-    elif isinstance(data, list):
-        for item in data:
-            if isinstance(item, (dict, list)):
-                found = find_links_in_json(item)
-                if found is not None:
-                    return found
+            # Wake up periodically in case a broken driver was discarded and a slot opened up
+            try:
+                return self._drivers.get(timeout=1)
+            except queue.Empty:
+                continue
+    
+    def release(self, driver, broken=False):
+        """Hand a borrowed driver back to the pool, or quit it if it stopped working"""
+        if not broken:
+            self._drivers.put(driver)
+            return
+        
+        self._discard(driver)
+    
+    def _discard(self, driver):
+        """Quit a driver and free its profile slot"""
+        try:
+            driver.quit()
+        except:
+            pass
+        
+        with self._lock:
+            slot = self._slot_of.pop(driver, None)
+            self._started -= 1
+        with profile_slots_lock:
+            profile_slots_in_use.discard(slot)
+    
+    def close(self):
+        """Quit every idle driver and free the profile directories"""
+        while True:
+            try:
+                driver = self._drivers.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+# One pool per worker process, shared by every request
+browser_pool = BrowserPool(size=MAX_BROWSERS)
+atexit.register(browser_pool.close)
+
+def find_links_in_json(data):
+    """
+    Searches a nested dictionary/list structure for the 'links' array with an explicit stack.
+    Returns None when no aboutChannelViewModel exists, or its (possibly empty) links list.
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            view_model = node.get('aboutChannelViewModel')
+            if isinstance(view_model, dict):
+                return view_model.get('links', [])
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        else:
+            continue
+        # Reversed so siblings are visited in document order, like the recursive walk did
+        stack.extend(child for child in reversed(children) if isinstance(child, (dict, list)))
     return None
 
+@lru_cache(maxsize=4096)
 def extract_clean_url(redirect_url):
     """
     Parses a YouTube redirect URL to extract and decode the actual destination URL
@@ -115,6 +422,136 @@ def extract_clean_url(redirect_url):
         print(f"Error parsing redirect URL: {e}")
     return None
 
+def slice_json_after(html_content, anchor, start=0):
+    """
+    Returns the brace-balanced JSON object that directly follows anchor, or None.
+    One linear pass that skips braces inside strings, instead of a lazy DOTALL regex that can backtrack.
+    """
+    anchor_pos = html_content.find(anchor, start)
+    if anchor_pos == -1:
+        return None
+    
+    begin = anchor_pos + len(anchor)
+    while begin < len(html_content) and html_content[begin].isspace():
+        begin += 1
+    if begin >= len(html_content) or html_content[begin] != '{':
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    for match in JSON_TOKEN_PATTERN.finditer(html_content, begin):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        
+        char = match.group()
+        if char == '\\':
+            if in_string:
+                escaped_pos = pos + 1
+        elif char == '"':
+            in_string = not in_string
+        elif not in_string:
+            if char == '{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return html_content[begin:pos + 1]
+    
+    return None
+
+def extract_links_from_html(html_content):
+    """
+    Extracts custom links from raw About page HTML via the embedded ytInitialData JSON.
+    Returns (None, message) when ytInitialData or its About section is missing so callers can fall back to Selenium.
+    """
+    # A plain substring scan rules out pages without the object before trying each anchor
+    marker = html_content.find('ytInitialData')
+    if marker == -1:
+        return None, "Could not find ytInitialData"
+    # Start the anchor search just before the first occurrence, leaving room for a 'var ' or 'window["' prefix
+    start = max(0, marker - 16)
+    
+    # Find the ytInitialData JSON object
+    data = None
+    for anchor in YT_INITIAL_DATA_ANCHORS:
+        json_text = slice_json_after(html_content, anchor, start)
+        if json_text:
+            try:
+                data = json_loads(json_text)
+                break
+            # orjson's JSONDecodeError subclasses the stdlib one
+            except json.JSONDecodeError:
+                continue
+    
+    if not data:
+        return None, "Could not find ytInitialData"
+
+    # Find the links array in the JSON data; None means the About view model is missing entirely
+    links_data = find_links_in_json(data)
+    
+    if links_data is None:
+        return None, "Could not find aboutChannelViewModel in ytInitialData"
+    if not links_data:
+        return [], "No custom links found in JSON data"
+
+    extracted_links = []
+    for link_item in links_data:
+        try:
+            link_info = link_item.get('channelExternalLinkViewModel', {})
+            title = link_info.get('title', {}).get('content', 'No Title')
+            redirect_url = link_info.get('link', {}).get('commandRuns', [{}])[0].get('onTap', {}).get('innertubeCommand', {}).get('urlEndpoint', {}).get('url')
+
+            if redirect_url:
+                clean_url = extract_clean_url(redirect_url)
+                if clean_url:
+                    extracted_links.append({'title': title, 'url': clean_url})
+
+        except (KeyError, IndexError) as e:
+            continue
+    
+    return extracted_links, "Success"
+
+async def fetch_html(session, url, sem):
+    """
+    Fetches the raw About page HTML for a channel URL, rotating the User-Agent per request.
+    Connection errors and 5xx responses are retried with exponential backoff.
+    """
+    async with sem:
+        headers = {
+            'User-Agent': random.choice(USER_AGENTS),
+            'Accept-Language': 'en-US,en;q=0.9',
+        }
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        for attempt in range(HTTP_RETRIES + 1):
+            await asyncio.sleep(rate_limiter.reserve())
+            try:
+                async with session.get(url.rstrip('/') + '/about', params={'hl': 'en'},
+                                       headers=headers, timeout=timeout) as response:
+                    if response.status >= 500 and attempt < HTTP_RETRIES:
+                        await asyncio.sleep(HTTP_BACKOFF * 2 ** attempt)
+                        continue
+                    if response.status == 429:
+                        rate_limiter.on_429()
+                    else:
+                        rate_limiter.on_success()
+                    # Still redirected to the consent wall: no ytInitialData here, so the row falls back to Selenium
+                    if response.url.host == 'consent.youtube.com':
+                        return ''
+                    return await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == HTTP_RETRIES:
+                    raise
+                await asyncio.sleep(HTTP_BACKOFF * 2 ** attempt)
+
+async def _gather(urls, max_concurrency=MAX_CONCURRENCY):
+    """Fetch all About pages concurrently, bounded by a semaphore"""
+    sem = asyncio.Semaphore(max_concurrency)
+    async with aiohttp.ClientSession(cookies=CONSENT_COOKIES) as session:
+        tasks = [fetch_html(session, url, sem) for url in urls]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
 def get_links_from_channel_url_selenium(channel_url, driver, retry_count=0):
     """
     Uses Selenium to fetch the 'About' page for a given YouTube channel URL and extract custom links.
@@ -132,17 +569,25 @@ def get_links_from_channel_url_selenium(channel_url, driver, retry_count=0):
         try:
             # Wait for either the page content or an error message
             WebDriverWait(driver, 15).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
+                lambda d: d.execute_script("return document.readyState") != "loading"
             )
-            
-            # Additional wait for dynamic content
-            time.sleep(3)
-            
         except TimeoutException:
             return [], "Page load timeout"
         
+        # Wait only as long as ytInitialData takes to appear; block pages never set it, so don't fail on timeout
+        try:
+            WebDriverWait(driver, YT_DATA_WAIT).until(
+                lambda d: d.execute_script("return typeof window.ytInitialData !== 'undefined'")
+            )
+        except TimeoutException:
+            pass
+        
+        # Get the page source after JavaScript execution; it serves both the block check and extraction
+        html_content = driver.page_source
+        
         # Check if we're being rate limited or blocked
-        if "unusual traffic" in driver.page_source.lower():
+        if BLOCK_PATTERN.search(html_content):
+            rate_limiter.on_429()
             if retry_count < 2:
                 wait_time = (retry_count + 1) * 120  # 2, 4 minutes
                 print(f"Detected unusual traffic message. Waiting {wait_time} seconds...")
@@ -151,103 +596,96 @@ def get_links_from_channel_url_selenium(channel_url, driver, retry_count=0):
             else:
                 return [], "Blocked due to unusual traffic - max retries exceeded"
         
-        # Get the page source after JavaScript execution
-        html_content = driver.page_source
-
-        # Find the ytInitialData JSON object
-        patterns = [
-            r'var ytInitialData = (\{.*?\});</script>',
-            r'window\["ytInitialData"\] = (\{.*?\});',
-            r'ytInitialData[""] = (\{.*?\});',
-            r'ytInitialData = (\{.*?\});'
-        ]
-        
-        data = None
-        for pattern in patterns:
-            match = re.search(pattern, html_content, re.DOTALL)
-            if match:
-                try:
-                    json_text = match.group(1)
-                    data = json.loads(json_text)
-                    break
-                except json.JSONDecodeError:
-                    continue
-        
-        if not data:
-            # Try alternative approach - look for links in the rendered page
-            try:
-                # Look for external link elements in the about section
-                link_elements = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/redirect?"]')
-                if link_elements:
-                    extracted_links = []
-                    for element in link_elements[:10]:  # Limit to first 10 links
-                        try:
-                            href = element.get_attribute('href')
-                            text = element.text.strip() or element.get_attribute('aria-label') or 'Link'
-                            if href and '/redirect?' in href:
-                                clean_url = extract_clean_url(href)
-                                if clean_url:
-                                    extracted_links.append({'title': text, 'url': clean_url})
-                        except:
-                            continue
-                    
-                    if extracted_links:
-                        return extracted_links, "Success (alternative method)"
-            except:
-                pass
-            
-            return [], "Could not find ytInitialData or alternative link elements"
-
-        # Find the links array in the JSON data
-        links_data = find_links_in_json(data)
-        
-        if not links_data:
-            return [], "No custom links found in JSON data"
-
-        extracted_links = []
-        for link_item in links_data:
-            try:
-                link_info = link_item.get('channelExternalLinkViewModel', {})
-                title = link_info.get('title', {}).get('content', 'No Title')
-                redirect_url = link_info.get('link', {}).get('commandRuns', [{}])[0].get('onTap', {}).get('innertubeCommand', {}).get('urlEndpoint', {}).get('url')
+        links, message = extract_links_from_html(html_content)
+        if links is not None:
+            return links, message
 
-                if redirect_url:
-                    clean_url = extract_clean_url(redirect_url)
-                    if clean_url:
-                        extracted_links.append({'title': title, 'url': clean_url})
-
-            except (KeyError, IndexError) as e:
-                continue
+        # Try alternative approach - look for links in the rendered page
+        try:
+            # Look for external link elements in the about section
+            link_elements = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/redirect?"]')
+            if link_elements:
+                extracted_links = []
+                for element in link_elements[:10]:  # Limit to first 10 links
+                    try:
+                        href = element.get_attribute('href')
+                        text = element.text.strip() or element.get_attribute('aria-label') or 'Link'
+                        if href and '/redirect?' in href:
+                            clean_url = extract_clean_url(href)
+                            if clean_url:
+                                extracted_links.append({'title': text, 'url': clean_url})
+                    except:
+                        continue
+                
+                if extracted_links:
+                    return extracted_links, "Success (alternative method)"
+        except:
+            pass
         
-        return extracted_links, "Success"
+        return [], "Could not find ytInitialData or alternative link elements"
 
     except WebDriverException as e:
         return [], f"WebDriver error: {str(e)}"
     except Exception as e:
         return [], f"Unexpected error: {str(e)}"
 
+@lru_cache(maxsize=4096)
+def get_link_category(url):
+    """Return the social media category for a URL's host (or any parent domain), else None"""
+    try:
+        host = urlparse(url).hostname or ''
+    except ValueError:
+        return None
+    
+    labels = host.split('.')
+    for i in range(len(labels) - 1):
+        category = KEYWORD_TO_CATEGORY.get('.'.join(labels[i:]))
+        if category:
+            return category
+    return None
+
 def categorize_links(links):
     """Categorize links into social media and other categories"""
     new_columns = ['Website'] + list(SOCIAL_MEDIA_KEYWORDS.keys()) + ['Other Links']
     categorized_links = {col: [] for col in new_columns}
     
     for link in links:
-        url = link.get('url', '').lower()
-        found_category = False
-        
-        for category, keywords in SOCIAL_MEDIA_KEYWORDS.items():
-            if any(keyword in url for keyword in keywords):
-                categorized_links[category].append(link['url'])
-                found_category = True
-                break
-        
-        if not found_category:
-            categorized_links['Other Links'].append(link['url'])
+        category = get_link_category(link.get('url', '')) or 'Other Links'
+        categorized_links[category].append(link['url'])
     
     return categorized_links, new_columns
 
+def build_link_row(links):
+    """Categorize links into the new column values for a single row"""
+    categorized_links, new_columns = categorize_links(links)
+    
+    # The first uncategorized link is treated as the channel's website
+    other_links = categorized_links['Other Links']
+    if other_links:
+        categorized_links['Website'].append(other_links.pop(0))
+    
+    return {col: ', '.join(categorized_links[col]) for col in new_columns}
+
+def scrape_with_pool(pool, channel_url):
+    """Scrape a single channel with a driver borrowed from the pool"""
+    driver = pool.acquire()
+    if driver is None:
+        return [], "Failed to initialize Chrome WebDriver"
+    
+    broken = False
+    try:
+        rate_limiter.acquire()
+        links, message = get_links_from_channel_url_selenium(channel_url, driver)
+        if not message.startswith("Blocked"):
+            rate_limiter.on_success()
+        # A crashed or disconnected Chrome would fail every later row it is lent to
+        broken = message.startswith("WebDriver error")
+        return links, message
+    finally:
+        pool.release(driver, broken=broken)
+
 def process_dataframe_selenium(df, url_column_name):
-    """Process the dataframe using Selenium with enhanced error handling"""
+    """Process the dataframe with concurrent HTTP fetches, using Selenium only as a fallback"""
     
     # Validate column exists
     if url_column_name not in df.columns:
@@ -259,61 +697,67 @@ def process_dataframe_selenium(df, url_column_name):
         if col not in df.columns:
             df[col] = ''
     
-    # Setup Selenium driver
-    driver = setup_selenium_driver()
-    if not driver:
-        return None, "Failed to initialize Chrome WebDriver. Please ensure Chrome is installed."
-    
     total_rows = len(df)
-    processed = 0
     errors = []
+    results = {}  # Row index -> new column values, applied in one pass at the end
     
-    try:
-        for index, row in df.iterrows():
-            try:
-                print(f"Processing row {index + 1} of {total_rows}...")
-                channel_url = row[url_column_name]
-                
-                # Skip if URL is empty or NaN
-                if pd.isna(channel_url) or not str(channel_url).strip():
-                    errors.append(f"Row {index + 1}: Empty URL")
-                    processed += 1
+    # Collect the rows that have a URL to scrape; only the URL column is walked, not whole row tuples
+    rows = []
+    for index, channel_url in df[url_column_name].items():
+        # Skip if URL is empty or NaN
+        if pd.isna(channel_url) or not str(channel_url).strip():
+            errors.append(f"Row {index + 1}: Empty URL")
+            continue
+        
+        rows.append((index, str(channel_url)))
+    
+    # Fetch all About pages concurrently over plain HTTP
+    print(f"Fetching {len(rows)} of {total_rows} rows over HTTP...")
+    pages = asyncio.run(_gather([channel_url for _, channel_url in rows]))
+    
+    fallback_rows = []
+    for (index, channel_url), html_content in zip(rows, pages):
+        if isinstance(html_content, Exception) or 'ytInitialData' not in html_content:
+            fallback_rows.append((index, channel_url))
+            continue
+        
+        links, message = extract_links_from_html(html_content)
+        if links is None:
+            fallback_rows.append((index, channel_url))
+        elif links:
+            results[index] = build_link_row(links)
+        elif message != "No custom links found in JSON data":
+            errors.append(f"Row {index + 1}: {message}")
+    
+    if fallback_rows:
+        print(f"Falling back to Selenium for {len(fallback_rows)} rows...")
+        
+        # Drivers come from the process-wide pool, so only the first fallback pays for Chrome startup
+        with ThreadPoolExecutor(max_workers=min(MAX_BROWSERS, len(fallback_rows))) as executor:
+            future_to_row = {
+                executor.submit(scrape_with_pool, browser_pool, channel_url): index
+                for index, channel_url in fallback_rows
+            }
+            
+            for future in as_completed(future_to_row):
+                index = future_to_row[future]
+                print(f"Processed row {index + 1} of {total_rows} with Selenium")
+                try:
+                    links, message = future.result()
+                except Exception as e:
+                    errors.append(f"Row {index + 1}: {str(e)}")
                     continue
                 
-                links, message = get_links_from_channel_url_selenium(str(channel_url), driver)
-                
                 if links:
-                    categorized_links, _ = categorize_links(links)
-                    
-                    # Assign links to appropriate columns
-                    for col in new_columns:
-                        link_list = categorized_links.get(col, [])
-                        if col == 'Other Links' and not df.at[index, 'Website']:
-                            if link_list:
-                                df.at[index, 'Website'] = link_list.pop(0)
-                        
-                        df.at[index, col] = ', '.join(link_list)
+                    results[index] = build_link_row(links)
                 else:
                     if message != "No custom links found in JSON data":
                         errors.append(f"Row {index + 1}: {message}")
-                
-                processed += 1
-                
-                # Anti-detection delay
-                delay = random.uniform(8, 15)  # Longer delays for Selenium
-                time.sleep(delay)
-                
-            except Exception as e:
-                errors.append(f"Row {index + 1}: {str(e)}")
-                processed += 1
-                continue
     
-    finally:
-        # Always close the driver
-        try:
-            driver.quit()
-        except:
-            pass
+    # Write every scraped row back in one block assignment; df.update would align and NaN-mask every cell
+    if results:
+        scraped = pd.DataFrame.from_dict(results, orient='index', columns=new_columns)
+        df.loc[scraped.index, new_columns] = scraped.to_numpy()
     
     print("Processing complete!")
     
@@ -324,7 +768,106 @@ def process_dataframe_selenium(df, url_column_name):
     
     return df, error_message
 
+def fast_preview_html(df, n=10):
+    """Render the first n rows as a Bootstrap table without pandas' to_html formatting pipeline"""
+    head = ''.join(f'<th>{escape(str(col))}</th>' for col in df.columns)
+    rows = ''.join(
+        '<tr>' + ''.join(f'<td>{"" if pd.isna(value) else escape(str(value))}</td>' for value in row) + '</tr>'
+        for row in df.head(n).itertuples(index=False, name=None)
+    )
+    return f'<table class="table table-striped"><thead><tr>{head}</tr></thead><tbody>{rows}</tbody></table>'
+
+def read_uploaded_file(path, **kwargs):
+    """Read an uploaded CSV or Excel file from disk into a DataFrame"""
+    if path.endswith('.csv'):
+        # pyarrow's multithreaded parser is much faster for full reads, but it can't stop after nrows
+        if 'nrows' not in kwargs:
+            kwargs.setdefault('engine', 'pyarrow')
+        return pd.read_csv(path, **kwargs)
+    return pd.read_excel(path, engine='calamine', **kwargs)
+
 # HTML templates
+# Compiled once at import; render_template_string would re-parse the source on every request
+UPLOAD_TEMPLATE = app.jinja_env.from_string('''
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Select Column - YouTube Links Scraper</title>
+        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
+        <style>
+            body { padding: 20px; }
+            .container { max-width: 800px; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Select URL Column</h1>
+            <p>Your file has been uploaded. Please select the column containing YouTube channel URLs:</p>
+
+            <div class="card mb-4">
+                <div class="card-body">
+                    <h5 class="card-title">Data Preview</h5>
+                    <div class="table-responsive">
+                        {{ table_html|safe }}
+                    </div>
+                </div>
+            </div>
+
+            <form action="/process" method="post">
+                <input type="hidden" name="temp_file" value="{{ temp_file }}">
+                <div class="mb-3">
+                    <label for="column" class="form-label">Select URL Column:</label>
+                    <select class="form-select" id="column" name="column">
+                        {% for column in columns %}
+                        <option value="{{ column }}">{{ column }}</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <button type="submit" class="btn btn-primary">Process Data</button>
+            </form>
+        </div>
+    </body>
+    </html>
+''')
+
+RESULT_TEMPLATE = app.jinja_env.from_string('''
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Results - YouTube Links Scraper</title>
+        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
+        <style>
+            body { padding: 20px; }
+            .container { max-width: 1000px; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Processing Complete!</h1>
+            {% if error_message %}
+            <div class="alert alert-warning">
+                {{ error_message }}
+            </div>
+            {% endif %}
+
+            <div class="card mb-4">
+                <div class="card-body">
+                    <h5 class="card-title">Results Preview</h5>
+                    <div class="table-responsive">
+                        {{ table_html|safe }}
+                    </div>
+                </div>
+            </div>
+
+            <div class="d-flex gap-2">
+                <a href="/download/{{ result_file }}/csv" class="btn btn-primary">Download as CSV</a>
+                <a href="/download/{{ result_file }}/excel" class="btn btn-success">Download as Excel</a>
+            </div>
+        </div>
+    </body>
+    </html>
+''')
+
 @app.route('/')
 def index():
     return '''
@@ -388,59 +931,21 @@ def upload_file():
     
     if file and (file.filename.endswith('.csv') or file.filename.endswith('.xlsx')):
         try:
-            # Read the file
-            if file.filename.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
+            # Stream the upload to a temporary file without parsing it
+            extension = os.path.splitext(file.filename)[1]
+            temp_file = f"upload_{uuid.uuid4().hex}{extension}"
+            upload_path = os.path.join(UPLOAD_DIR, temp_file)
+            file.save(upload_path)
+            with uploaded_files_lock:
+                uploaded_files[temp_file] = time.time()
+            schedule_sweep()
             
-            # Store the dataframe in a session or temporary file
-            temp_file = f"temp_{int(time.time())}.csv"
-            df.to_csv(temp_file, index=False)
+            # Only parse the rows needed for the preview
+            preview_df = read_uploaded_file(upload_path, nrows=5)
             
             # Return column selection page
-            columns = df.columns.tolist()
-            return render_template_string('''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Select Column - YouTube Links Scraper</title>
-                    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-                    <style>
-                        body { padding: 20px; }
-                        .container { max-width: 800px; }
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h1>Select URL Column</h1>
-                        <p>Your file has been uploaded. Please select the column containing YouTube channel URLs:</p>
-                        
-                        <div class="card mb-4">
-                            <div class="card-body">
-                                <h5 class="card-title">Data Preview</h5>
-                                <div class="table-responsive">
-                                    {{ table_html|safe }}
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <form action="/process" method="post">
-                            <input type="hidden" name="temp_file" value="{{ temp_file }}">
-                            <div class="mb-3">
-                                <label for="column" class="form-label">Select URL Column:</label>
-                                <select class="form-select" id="column" name="column">
-                                    {% for column in columns %}
-                                    <option value="{{ column }}">{{ column }}</option>
-                                    {% endfor %}
-                                </select>
-                            </div>
-                            <button type="submit" class="btn btn-primary">Process Data</button>
-                        </form>
-                    </div>
-                </body>
-                </html>
-            ''', columns=columns, temp_file=temp_file, table_html=df.head().to_html(classes='table table-striped'))
+            columns = preview_df.columns.tolist()
+            return UPLOAD_TEMPLATE.render(columns=columns, temp_file=temp_file, table_html=fast_preview_html(preview_df, n=5))
         
         except Exception as e:
             return jsonify({'error': f'Error processing file: {str(e)}'}), 500
@@ -455,9 +960,16 @@ def process_data():
     if not temp_file or not column:
         return jsonify({'error': 'Missing required parameters'}), 400
     
+    # The form only names the upload; it must be one this app saved, resolved inside UPLOAD_DIR
+    upload_path = safe_join(UPLOAD_DIR, secure_filename(temp_file))
+    with uploaded_files_lock:
+        known_upload = temp_file in uploaded_files
+    if upload_path is None or not known_upload or not os.path.isfile(upload_path):
+        return jsonify({'error': 'Upload not found or expired. Please upload the file again.'}), 404
+    
     try:
         # Read the temporary file
-        df = pd.read_csv(temp_file)
+        df = read_uploaded_file(upload_path)
         
         # Process the dataframe
         processed_df, error_message = process_dataframe_selenium(df, column)
@@ -465,77 +977,245 @@ def process_data():
         if processed_df is None:
             return jsonify({'error': error_message}), 400
         
+        # Only the first rows are shown, so render them before the full frame is written out
+        table_html = fast_preview_html(processed_df)
+        
         # Save the processed dataframe
-        result_file = f"result_{int(time.time())}.csv"
-        processed_df.to_csv(result_file, index=False)
+        result_file = f"result_{uuid.uuid4().hex}.parquet"
+        result_path = os.path.join(RESULT_DIR, result_file)
+        cache_result_frame(result_file, processed_df)
+        write_result_file(processed_df, result_path)
+        
+        # Build the Excel artifact once here so downloads only have to send it
+        with open(excel_path_for(result_path), 'wb') as excel_file:
+            write_xlsx_fast(processed_df, excel_file)
+        del df, processed_df
+        
+        # The result is safely on disk, so the upload is no longer needed
+        with uploaded_files_lock:
+            uploaded_files.pop(temp_file, None)
+        cleanup_pool.submit(safe_unlink, upload_path)
+        schedule_sweep()
         
         # Return results page
-        return render_template_string('''
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Results - YouTube Links Scraper</title>
-                <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-                <style>
-                    body { padding: 20px; }
-                    .container { max-width: 1000px; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <h1>Processing Complete!</h1>
-                    {% if error_message %}
-                    <div class="alert alert-warning">
-                        {{ error_message }}
-                    </div>
-                    {% endif %}
-                    
-                    <div class="card mb-4">
-                        <div class="card-body">
-                            <h5 class="card-title">Results Preview</h5>
-                            <div class="table-responsive">
-                                {{ table_html|safe }}
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="d-flex gap-2">
-                        <a href="/download/{{ result_file }}/csv" class="btn btn-primary">Download as CSV</a>
-                        <a href="/download/{{ result_file }}/excel" class="btn btn-success">Download as Excel</a>
-                    </div>
-                </div>
-            </body>
-            </html>
-        ''', result_file=result_file, error_message=error_message, table_html=processed_df.head(10).to_html(classes='table table-striped'))
+        return RESULT_TEMPLATE.render(result_file=result_file, error_message=error_message, table_html=table_html)
     
     except Exception as e:
         return jsonify({'error': f'Error processing data: {str(e)}'}), 500
 
+def safe_unlink(path):
+    """Delete a file, ignoring it if it is already gone"""
+    try:
+        os.unlink(path)
+    except OSError as e:
+        print(f"Could not remove {path}: {e}")
+
+def sweep_expired_files():
+    """Delete results and abandoned uploads older than FILE_TTL"""
+    cutoff = time.time() - FILE_TTL
+    for directory in (RESULT_DIR, UPLOAD_DIR):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            print(f"Could not scan {directory}: {e}")
+            continue
+        for entry in entries:
+            try:
+                expired = entry.is_file() and entry.stat().st_mtime < cutoff
+            except OSError:
+                continue
+            if not expired:
+                continue
+            safe_unlink(entry.path)
+            with uploaded_files_lock:
+                uploaded_files.pop(entry.name, None)
+            with result_cache_lock:
+                result_cache.pop(entry.name, None)
+
+def schedule_sweep():
+    """Queue a sweep on the cleanup pool unless one ran within SWEEP_INTERVAL"""
+    now = time.time()
+    with sweep_lock:
+        if now - sweep_state['last_sweep'] < SWEEP_INTERVAL:
+            return
+        sweep_state['last_sweep'] = now
+    cleanup_pool.submit(sweep_expired_files)
+
+def cache_result_frame(result_file, df):
+    """Remember a processed DataFrame so downloads can skip re-reading it from disk"""
+    if len(df) > RESULT_CACHE_MAX_ROWS:
+        return
+    with result_cache_lock:
+        result_cache[result_file] = df
+        result_cache.move_to_end(result_file)
+        while len(result_cache) > RESULT_CACHE_SIZE:
+            result_cache.popitem(last=False)
+
+def get_cached_result_frame(result_file):
+    """Return the cached DataFrame for a result file, or None on a miss"""
+    with result_cache_lock:
+        df = result_cache.get(result_file)
+        if df is not None:
+            result_cache.move_to_end(result_file)
+        return df
+
+def write_result_file(df, result_file):
+    """Persist a processed DataFrame as zstd-compressed Parquet for fast, typed reloads"""
+    # Arrow needs one type per column; uploaded object columns can mix numbers and text
+    object_columns = df.select_dtypes(include='object').columns
+    df.astype({col: 'string' for col in object_columns}).to_parquet(
+        result_file, engine='pyarrow', compression='zstd', index=False
+    )
+
+def excel_path_for(result_file):
+    """Path of the prebuilt xlsx that sits next to a Parquet result file"""
+    return os.path.splitext(result_file)[0] + '.xlsx'
+
+def generate_csv(df, chunksize=10_000):
+    """Yield a DataFrame as CSV text in row chunks so the response streams"""
+    if df.empty:
+        yield df.to_csv(index=False)
+        return
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize].to_csv(index=False, header=(start == 0))
+
+def gzip_stream(chunks):
+    """Gzip a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def xlsx_cell(value):
+    """Render one value as a SpreadsheetML <c> element; missing values keep their slot as an empty cell"""
+    # pd.isna covers None, NaN, pd.NA and NaT; the scalar check keeps list-like cells out of it
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return XLSX_EMPTY_CELL
+    if isinstance(value, bool):
+        return XLSX_BOOL_CELLS[value]
+    if isinstance(value, datetime.datetime):
+        # Excel has no timezones, so aware values keep their wall-clock time
+        serial = (value.replace(tzinfo=None) - XLSX_EPOCH) / datetime.timedelta(days=1)
+        return XLSX_DATE_CELL.format(serial)
+    if isinstance(value, datetime.date):
+        return XLSX_DATE_CELL.format((value - XLSX_EPOCH.date()).days)
+    if isinstance(value, numbers.Number) and math.isfinite(value):
+        return f'<c><v>{value}</v></c>'
+    text = XML_ILLEGAL_CHARS.sub('', str(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+def xlsx_column_cells(column):
+    """Render a whole column to <c> elements at once, using vectorized string ops where the dtype allows"""
+    if pd.api.types.is_bool_dtype(column):
+        cells = column.map(XLSX_BOOL_CELLS)
+    elif pd.api.types.is_datetime64_any_dtype(column):
+        if column.dt.tz is not None:
+            column = column.dt.tz_localize(None)
+        serials = (column - XLSX_EPOCH) / pd.Timedelta(days=1)
+        cells = '<c s="1"><v>' + serials.astype('string') + '</v></c>'
+    elif pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_complex_dtype(column):
+        cells = '<c><v>' + column.astype('string') + '</v></c>'
+        infinite = column.isin([math.inf, -math.inf])
+        if infinite.any():
+            cells[infinite] = column[infinite].map(xlsx_cell)
+    elif pd.api.types.infer_dtype(column, skipna=True) in ('string', 'empty'):
+        text = (
+            column.astype('string')
+            .str.replace(XML_ILLEGAL_CHARS, '', regex=True)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False)
+        )
+        cells = '<c t="inlineStr"><is><t xml:space="preserve">' + text + '</t></is></c>'
+    else:
+        # Mixed object columns still need the per-value type dispatch
+        return column.map(xlsx_cell).tolist()
+    return cells.astype(object).fillna(XLSX_EMPTY_CELL).tolist()
+
+def write_xlsx_fast(df, output):
+    """
+    Writes a DataFrame as a single-sheet xlsx by emitting the SpreadsheetML parts directly.
+    The sheet XML is streamed into the zip row by row, so memory stays flat regardless of size.
+    """
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(XLSX_SHEET_HEADER)
+            header = ''.join(xlsx_cell(str(col)) for col in df.columns)
+            sheet.write(f'<row r="1">{header}</row>'.encode('utf-8'))
+            
+            # Each column is converted once; rows are then just joins of ready-made cells
+            columns = [xlsx_column_cells(df.iloc[:, i]) for i in range(df.shape[1])]
+            for row_number, row in enumerate(zip(*columns), start=2):
+                cells = ''.join(row)
+                sheet.write(f'<row r="{row_number}">{cells}</row>'.encode('utf-8'))
+            
+            sheet.write(XLSX_SHEET_FOOTER)
+
 @app.route('/download/<filename>/<format>')
 def download_file(filename, format):
+    if format not in ALLOWED_FORMATS:
+        abort(400)
+    
+    # Resolve once inside RESULT_DIR; anything that escapes it is treated as missing
+    result_path = safe_join(RESULT_DIR, filename)
+    if result_path is None:
+        abort(404)
+    path = excel_path_for(result_path) if format == 'excel' else result_path
+    if not os.path.isfile(path):
+        abort(404)
+    
+    # The result filename already carries a unique token, so reuse it
+    download_stem = f"youtube_links_{os.path.splitext(os.path.basename(filename))[0]}"
+    
     try:
-        df = pd.read_csv(filename)
-        
         if format == 'excel':
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
-            output.seek(0)
-            return send_file(
-                output,
-                as_attachment=True,
-                download_name=f"youtube_links_{int(time.time())}.xlsx",
-                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        else:
+            # Lets browsers revalidate with If-None-Match / If-Modified-Since and get a 304
             return send_file(
-                filename,
+                path,
                 as_attachment=True,
-                download_name=f"youtube_links_{int(time.time())}.csv",
-                mimetype="text/csv"
+                download_name=f"{download_stem}.xlsx",
+                mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                conditional=True,
+                etag=True,
+                last_modified=os.path.getmtime(path)
             )
-    except Exception as e:
+        
+        # The CSV is rebuilt from the stored result, so answer revalidations before loading it
+        stat = os.stat(path)
+        use_gzip = 'gzip' in request.accept_encodings
+        etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}{'-gz' if use_gzip else ''}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304, headers={'Vary': 'Accept-Encoding'})
+            response.set_etag(etag)
+            return response
+        
+        # Reuse the DataFrame from /process when this worker still has it
+        df = get_cached_result_frame(filename)
+        if df is None:
+            df = pd.read_parquet(path, engine='pyarrow')
+    except (OSError, ValueError) as e:
         return jsonify({'error': f'Error downloading file: {str(e)}'}), 500
+    
+    headers = {'Content-Disposition': f'attachment; filename={download_stem}.csv', 'Vary': 'Accept-Encoding'}
+    body = generate_csv(df)
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        body = gzip_stream(body)
+    response = Response(body, mimetype="text/csv", headers=headers)
+    response.set_etag(etag)
+    response.last_modified = stat.st_mtime
+    return response
+
+os.makedirs(RESULT_DIR, exist_ok=True)
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Move everything allocated at import into the permanent generation so collections skip it
+gc.freeze()
 
 if __name__ == '__main__':
     # Use the PORT environment variable for compatibility with cloud platforms
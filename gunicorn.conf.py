@@ -7,16 +7,18 @@ import os
 bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 
 # Worker processes
-workers = 1
-threads = 2
-worker_class = 'sync'
+# Scrapes spend their time waiting on Chrome and sockets, so concurrency comes from threads.
+# Drivers, caches and the /download registry live in-process; add workers only behind sticky routing.
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+threads = 8
+worker_class = 'gthread'
 
 # Timeout - increased to accommodate longer processing times
 timeout = 300  # 5 minutes
 
 # Maximum requests a worker will process before restarting
-max_requests = 5
-max_requests_jitter = 2
+max_requests = 1000
+max_requests_jitter = 50
 
 # Process naming
 proc_name = 'youtube-links-scraper'
@@ -28,6 +30,7 @@ umask = 0
 user = None
 group = None
 tmp_upload_dir = None
+sendfile = True  # Hand on-disk download files to the kernel with sendfile(2)
 
 # Logging
 errorlog = '-'
@@ -39,5 +42,10 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 def on_starting(server):
     server.log.info("Starting YouTube Links Scraper")
 
+def post_worker_init(worker):
+    # The app module is already loaded in the worker; start its Chrome drivers before serving
+    from app import warm_driver_pool
+    warm_driver_pool()
+
 def on_exit(server):
     server.log.info("Shutting down YouTube Links Scraper")